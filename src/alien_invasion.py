@@ -1,32 +1,65 @@
-import json
+# Startup profile (first, to time the imports below)
+from startup import startup
+
 import os
 import sys
+import time
 from datetime import datetime
 from pathlib import Path
-from time import sleep
 
 import pygame
-from pygame.mixer import Sound
 
-from alien import Alien
-from bullet import Bullet
+from assets import assets
 from button import Button
-from game_stats import GameStats
+# Game rules
+from engine import (
+    FIRE,
+    MOVE_LEFT,
+    MOVE_RIGHT,
+    PAUSE,
+    START,
+    STOP_LEFT,
+    STOP_RIGHT,
+    GameEngine,
+)
+from frame_phases import DRAW, EVENTS, LOGIC, PRESENT, WAIT
+from frame_timer import FrameTimer
+from governor import FLEET_LAYER, HALF_RATE, QUIET, SLOW_HUD, PerformanceGovernor
+from idle import FOCUS_GAINED_EVENTS, FOCUS_LOST_EVENTS, REDRAW_EVENTS, wait_events
 # Configuration menu
 from ini_config import conff_menu
+from input_trace import TraceRecorder, load_trace, make_engine, replay
+from renderer import DirtyRectRenderer
+from save_store import get_save_store
+from scheduler import Scheduler
+from score_store import get_score_store
 from scoreboard import Scoreboard
 # Data structures
 from settings import Settings
-# Graphic assets
-from ship import Ship
+from window import window
+
+startup.mark("imports")
+
+# Sound effects of the game, in the sounds folder.
+SOUND_FILES = [
+    "ambient.wav",
+    "loose_ship.wav",
+    "laser.wav",
+    "click.wav",
+    "fail_shot.wav",
+    "game_won.wav",
+]
 
 
 class AlienInvasion:
-    """Overall class to manage game assets and behavior"""
+    """
+    Overall class to manage game assets and behavior. The game rules live
+    in GameEngine, this class draws them and turns user input into commands
+    """
 
     def __init__(self, configuration, main_path):
         """Initialize the game, and create game resources"""
-        pygame.init()
+        window.init()
 
         ############################################################################################
         # System configuration
@@ -37,8 +70,10 @@ class AlienInvasion:
 
         # Path for the game assets and user data.
         self.path = main_path
-        self.high_scores_filename = self.path + "user_data/high_scores.json"
-        self.saved_games_filename = self.path + "user_data/saved_games.json"
+        self.score_store, self.save_store = self._open_stores()
+
+        # Ranking of the registered users, to show the live rank of the player.
+        self.ranking = self.score_store.ranking() if self.user != "anon" else None
 
         # Set initial difficulty and general settings.
         self.ini_diff = configuration[1]
@@ -46,68 +81,78 @@ class AlienInvasion:
 
         # Configure screen.
         self.screen_size = configuration[2]
-        if self.screen_size == "Full Screen":
-            self.screen = pygame.display.set_mode((0, 0), pygame.FULLSCREEN)
-        else:
-            self.screen = pygame.display.set_mode(
-                (self.settings.screen_width, self.settings.screen_height)
-            )
+        self.screen = self._open_scene()
         self.screen_rect = self.screen.get_rect()
-        pygame.display.set_caption("Alien Invasion")
 
-        # Create an instance to store game statistics.
-        high_score = self._retrive_high_score()
-        self.stats = GameStats(self, high_score)
+        # Renderer that only pushes the changed parts of the screen to the display.
+        self.renderer = DirtyRectRenderer(
+            self.screen, self.settings.bg_color, self.settings.max_dirty_fraction
+        )
 
-        # Create a Scoreboard to display score and level data on the screen.
-        self.sb = Scoreboard(self)
+        # Window state: nothing is simulated or drawn while the window is not focused,
+        # and while idle (paused, or waiting for Play) only changes are drawn.
+        self.has_focus = True
+        self.needs_redraw = True
 
         ############################################################################################
-        # Game assets.
+        # Game state
         ############################################################################################
 
-        # Load sound effects.
-        self._load_sound_effects()
-
-        # Create an instance for a ship and groups for bullets and aliens.
-        self.ship = Ship(self)
-        self.bullets = pygame.sprite.Group()
-        self.aliens = pygame.sprite.Group()
+        # Create the game rules and state (ship, fleet, bullets and statistics).
+        high_score = self._retrive_high_score()
+        self.engine = GameEngine(
+            self.settings, self.screen_rect, self.path, self.ini_diff, high_score
+        )
+        self.stats = self.engine.stats
 
-        # Saved game?
+        # Load saved game state.
         if configuration[3]:
-            self.saved_game = True
-        else:
-            self.saved_game = False
-            # Create the fleet of aliens if this is a new game.
-            self._create_fleet()
+            self.engine.load_state(configuration[3])
+
+        # Record the commands sent to the engine, to replay the game later (one trace
+        # file per game, from its start to its end).
+        self.record_traces = "--record-trace" in sys.argv
+        self.recorder = None
+
+        # Create a Scoreboard to display score and level data on the screen.
+        self.sb = Scoreboard(self)
+
+        # Time each phase of the frames (turned on with --frame-timing, or F3).
+        self.frame_timer = None
+        if "--frame-timing" in sys.argv:
+            self._start_frame_timing()
 
         ############################################################################################
-        # Load saved game state
+        # Game assets.
         ############################################################################################
 
-        if self.saved_game:
-            saved_game = configuration[3]
+        # Load sound effects.
+        self._load_sound_effects()
 
-            # Scores.
-            self.stats.ships_left = saved_game["ship_left"]
-            self.sb.prep_ships()
-            self.stats.score = saved_game["current_score"]
-            self.sb.prep_score()
-            self.stats.level = saved_game["level"]
-            self.sb.prep_level()
+        # Clock used by the main loop.
+        self.clock = pygame.time.Clock()
+
+        # Delayed actions, run by the main loop.
+        self.scheduler = Scheduler()
+
+        # Quality levels, lowered when the frames take too long. The fleet layer level
+        # is skipped if the layer is always used.
+        self.cache_fleet_layer = self.settings.cache_fleet_layer
+        self.governor = PerformanceGovernor(
+            self.settings.frame_budget,
+            self.settings.quality_headroom,
+            self.settings.quality_cooldown,
+            enabled=self.settings.adaptive_quality,
+            skip_levels=(FLEET_LAYER,) if self.cache_fleet_layer else (),
+        )
 
-            # Speeds.
-            self.settings.ship_speed = saved_game["ship_speed"]
-            self.settings.bullet_speed = saved_game["bullet_speed"]
-            self.settings.alien_speed = saved_game["alien_speed"]
-            self.settings.alien_points = saved_game["alien_points"]
-            self.settings.fleet_direction = saved_game["fleet_direction"]
+        # Scoring values not drawn yet (at the slow HUD level), and time of the last
+        # time they were drawn.
+        self.hud_pending = False
+        self.last_hud_refresh = 0.0
 
-            # Screen state.
-            self.ship.x = saved_game["ship_x"]
-            self.ship.rect.x = int(self.ship.x)
-            self._get_saved_fleet(saved_game["aliens"], self.aliens)
+        # Is the next frame skipped? (at the half rate level)
+        self.skip_frame = False
 
         ############################################################################################
         # Buttons
@@ -154,116 +199,251 @@ class AlienInvasion:
     # Set-up functions
     ################################################################################################
 
-    def _get_saved_fleet(self, saved_fleet, new_fleet):
-        """Load saved alien fleet"""
-        for item in saved_fleet:
-            alien = Alien(self)
-            alien.x = item["x"]
-            alien.rect.y = item["y"]
-            alien.rect.x = int(alien.x)
-            new_fleet.add(alien)
+    def _open_stores(self):
+        """Return the score store and the saved games store of the user data"""
+        return get_score_store(self.path), get_save_store(self.path)
+
+    def _open_scene(self):
+        """
+        Return the surface the game draws on, inside the game window. The window is
+        only reopened to switch to or from full screen or vertical sync
+        """
+        if self.screen_size == "Full Screen":
+            return window.open_scene(
+                None, "Alien Invasion", fullscreen=True, vsync=self.settings.vsync
+            )
+
+        size = (self.settings.screen_width, self.settings.screen_height)
+        return window.open_scene(
+            size, "Alien Invasion", fullscreen=False, vsync=self.settings.vsync
+        )
+
+    @staticmethod
+    def preload_assets(main_path):
+        """Start loading the game images and sounds in the background"""
+        assets.preload(
+            images=[main_path + "images/ship.bmp", main_path + "images/alien.bmp"],
+            sounds=[main_path + "sounds/" + name for name in SOUND_FILES],
+        )
 
     def _load_sound_effects(self):
-        """Load sound files for the game sound effects"""
+        """
+        Get the sound effects from the shared sound bank. Each file is only
+        decoded the first time it is played, and only once per process
+        """
 
         # Set ambient sound and reduce its volume to be less annoying.
-        self.ambient_sound = Sound(self.path + "sounds/ambient.wav")
-        self.ambient_sound.set_volume(0.5)
+        self.ambient_sound = assets.sound(self.path + "sounds/ambient.wav", volume=0.5)
 
         # Set other sounds effects.
-        self.loose_ship_sound = Sound(self.path + "sounds/loose_ship.wav")
-        self.laser_sound = Sound(self.path + "sounds/laser.wav")
-        self.click_sound = Sound(self.path + "sounds/click.wav")
-        self.fail_shot = Sound(self.path + "sounds/fail_shot.wav")
-        self.game_won_sound = Sound(self.path + "sounds/game_won.wav")
-        self.game_won_sound.set_volume(2)
+        self.loose_ship_sound = assets.sound(self.path + "sounds/loose_ship.wav")
+        self.laser_sound = assets.sound(self.path + "sounds/laser.wav")
+        self.click_sound = assets.sound(self.path + "sounds/click.wav")
+        self.fail_shot = assets.sound(self.path + "sounds/fail_shot.wav")
+        self.game_won_sound = assets.sound(self.path + "sounds/game_won.wav", volume=2)
+
+    def _start_frame_timing(self):
+        """Start timing the phases of the frames, with the overlay shown"""
+        self.frame_timer = FrameTimer(
+            self.path,
+            self.settings.frame_timing_frames,
+            self.settings.frame_timing_refresh,
+        )
+        self.engine.timer = self.frame_timer
 
     def _retrive_high_score(self):
         """Retrive user highest past score"""
         if self.user == "anon":
             return 0
         else:
-            try:
-                with open(self.high_scores_filename) as f:
-                    score = json.load(f)
-                return score[self.user]["high_score"]
-            except FileNotFoundError:
-                return 0
-
-    def _create_fleet(self):
-        """Create the fleet of aliens"""
-
-        # Create an alien and find its size and the height of the ship.
-        alien = Alien(self)
-        alien_width, alien_height = alien.rect.size
-        ship_height = self.ship.rect.height
-
-        # Determine the number of columns of aliens that fit on the screen,
-        # spacing between each alien is equal to one alien width.
-        available_space_x = self.screen_rect.width - (2 * alien_width)
-        number_columns = available_space_x // (2 * alien_width)
-
-        # Determine the number of rows of aliens that fit on the screen,
-        # spacing between each alien is equal to one alien height.
-        available_space_y = (
-            self.settings.screen_height - (3 * alien_height) - ship_height
-        )
-        number_rows = available_space_y // (2 * alien_height)
-
-        # Create the full fleet of aliens.
-        for row_number in range(number_rows):
-            for column_number in range(number_columns):
-                self._create_alien(column_number, row_number)
-
-    def _create_alien(self, column_number, row_number):
-        """Create an alien and place it in the corresponding position"""
-        alien = Alien(self)
-        alien_width, alien_height = alien.rect.size
-        alien.x = alien_width + 2 * alien_width * column_number
-        alien.rect.y = alien_height + 2 * alien_height * row_number
-        alien.rect.x = alien.x
-        self.aliens.add(alien)
+            return self.score_store.get_high_score(self.user)
 
     ################################################################################################
     # Run-time functions
     ################################################################################################
 
     def run_game(self):
-        """Start the main loop for the game"""
+        """
+        Start the main loop for the game. The game logic advances in fixed steps of
+        settings.tick_time seconds, independently of how many frames are drawn
+        """
+        clock = self.clock
+        tick_time = self.settings.tick_time
+
+        # Simulation time still to be processed.
+        lag = 0.0
+
         while True:
-            restart = self._check_events()
+            idle = self._is_idle()
+            restart = self._check_events(idle)
+            timer = self.frame_timer
 
             # If the players won the game and clicks
             # on the screen, go back to the main menu.
             if restart:
                 return None
 
-            if self.stats.game_active and not self.stats.game_pause:
-                self.ship.update()
-                self._update_bullets()
-                self._update_aliens()
+            if idle:
+                # Nothing moves, so drop the pending simulation time
+                # and only draw if something changed.
+                self._update_scheduler(clock.tick() / 1000)
+                lag = 0.0
+                if self.hud_pending:
+                    self._refresh_hud(force=True)
+                    self.needs_redraw = True
+                if self.needs_redraw and self.has_focus and not self.stats.game_end:
+                    self._update_screen()
+                self.needs_redraw = False
+                # Idle frames are not timed.
+                if timer:
+                    timer.restart_frame()
+                self.governor.restart_window()
+                continue
+
+            if timer:
+                timer.lap(EVENTS)
+
+            # Wait for the frame cap and add the elapsed time to the pending simulation time.
+            frame_time = clock.tick(self.settings.max_fps) / 1000
+            if timer:
+                timer.lap(WAIT)
+
+            # Change the quality if the last frame took too long, or much less.
+            if self.governor.update(clock.get_rawtime() / 1000):
+                self._set_quality(self.governor.level)
+
+            self._update_scheduler(frame_time)
+            if self.scheduler.is_holding():
+                # Game time doesn't run while a delayed action holds the game.
+                lag = 0.0
+            else:
+                lag += min(frame_time, self.settings.max_frame_time)
+
+            if timer:
+                timer.lap(LOGIC)
+
+            while lag >= tick_time:
+                lag -= tick_time
+                self.engine.step(tick_time)
+                self._check_engine_events()
+                if timer:
+                    timer.lap(LOGIC)
+
+            # At the half rate level, only every other frame is drawn.
+            self.skip_frame = self.governor.level >= HALF_RATE and not self.skip_frame
+            if not self.stats.game_end and not self.skip_frame:
+                self._update_screen()
+
+            if timer:
+                timer.end_frame()
+
+    def replay_trace(self, trace):
+        """
+        Play an input trace through the game as fast as possible, drawing a frame
+        every few ticks, and return the checksum of the final state
+        """
+        if self.screen_rect.size != trace.screen_dims:
+            width, height = trace.screen_dims
+            raise ValueError(f"The trace was recorded on a {width}x{height} screen")
+
+        # The high score is the one of the recorded game.
+        self.stats.high_score = trace.high_score
+        self.sb.prep_high_score()
 
-            if not self.stats.game_end:
+        # Draw as many frames as the game would, for the same game time.
+        if self.settings.max_fps:
+            ticks_per_frame = max(self.settings.tick_rate // self.settings.max_fps, 1)
+        else:
+            ticks_per_frame = 1
+
+        def on_step():
+            self._check_engine_events()
+            if self.engine.tick % ticks_per_frame == 0 and not self.stats.game_end:
                 self._update_screen()
+                pygame.event.pump()
 
-            if self.stats.level > 50 and self.stats.game_active:
-                self._show_won_game_message()
+        return replay(trace, self.engine, self._apply, on_step)
+
+    def _is_idle(self):
+        """
+        Return True if the game logic is stopped (paused, waiting for Play,
+        or the window is not focused), so the loop can sleep until there is input
+        """
+        return not self.has_focus or not self.stats.game_active or self.stats.game_pause
+
+    def _update_scheduler(self, dt):
+        """Advance the delayed actions, except while the game is paused"""
+        if not self.stats.game_pause:
+            self.scheduler.update(dt)
+
+    def _get_idle_timeout(self):
+        """Return how long (in ms) the idle loop can sleep, waking up for delayed actions"""
+        timeout = self.settings.idle_timeout
+        time_to_next = self.scheduler.time_to_next()
+        if time_to_next is not None and not self.stats.game_pause:
+            # pygame.event.wait(0) would never time out.
+            timeout = max(min(timeout, int(time_to_next * 1000) + 1), 1)
+        return timeout
 
     def _update_screen(self):
         """Update images on the screen, and flip to the new screen"""
+        if self.hud_pending:
+            self._refresh_hud()
+
+        timer = self.frame_timer
+        if self.settings.dirty_rects:
+            # Erase the last frame and draw everything again, but only
+            # push the areas that changed to the display.
+            self.renderer.begin_frame()
+            self._draw_frame()
+            rects = self._get_frame_rects()
+            if timer:
+                timer.lap(DRAW)
+            self.renderer.present(rects)
+        else:
+            # Background color.
+            self.screen.fill(self.settings.bg_color)
+            self._draw_frame()
+            if timer:
+                timer.lap(DRAW)
+            pygame.display.flip()
+        if timer:
+            timer.lap(PRESENT)
+
+    def _set_quality(self, level):
+        """Apply the quality level set by the governor"""
+
+        # The fleet layer is used from FLEET_LAYER down, or always if configured.
+        self.settings.cache_fleet_layer = self.cache_fleet_layer or level >= FLEET_LAYER
+
+        # Above SLOW_HUD every scoring value is drawn right away.
+        if level < SLOW_HUD and self.hud_pending:
+            self._refresh_hud(force=True)
+
+    def _refresh_hud(self, force=False):
+        """
+        Draw the scoring values that changed at the slow HUD level,
+        if it is time to (or if force is True)
+        """
+        now = time.perf_counter()
+        if force or now - self.last_hud_refresh >= self.settings.slow_hud_refresh:
+            self.sb.prep_score()
+            self.sb.prep_high_score()
+            self.sb.prep_rank()
+            self.hud_pending = False
+            self.last_hud_refresh = now
 
-        # Background color.
-        self.screen.fill(self.settings.bg_color)
+    def _draw_frame(self):
+        """Draw every element of the game on the screen"""
 
         # Draw ship.
-        self.ship.blitme()
+        self.engine.ship.blitme(self.screen)
 
         # Draw bullets.
-        for bullet in self.bullets.sprites():
-            bullet.draw_bullet()
+        self.engine.bullets.draw(self.screen)
 
         # Draw aliens.
-        self.aliens.draw(self.screen)
+        self.engine.fleet.draw(self.screen)
 
         # Draw the score information.
         self.sb.show_score()
@@ -278,15 +458,54 @@ class AlienInvasion:
         if not self.stats.game_active:
             self.play_button.draw_button(self.screen)
 
-        pygame.display.flip()
+        # Draw the frame timing overlay, below the ships left.
+        if self.frame_timer and self.frame_timer.show_overlay:
+            self.frame_timer.draw_overlay(self.screen, (10, 70))
+
+    def _get_frame_rects(self):
+        """Return the screen areas covered by the elements drawn on this frame"""
+        rects = [self.engine.ship.rect]
+        rects.extend(pygame.Rect(rect) for rect in self.engine.bullets.get_rects())
+
+        # The fleet moves as a whole, so a single rect around it is enough.
+        if self.engine.fleet:
+            rects.append(self.engine.fleet.get_rect())
+
+        rects.extend(self.sb.get_rects())
+
+        if self.stats.game_pause:
+            rects.append(self.resume_button.b_rect)
+            rects.append(self.quit_button.b_rect)
+            if self.user != "anon":
+                rects.append(self.save_button.b_rect)
+        if not self.stats.game_active:
+            rects.append(self.play_button.b_rect)
+        if self.frame_timer and self.frame_timer.show_overlay:
+            rects.append(self.frame_timer.overlay_rect)
+
+        return rects
 
     ################################################################################################
     # User-actions functions
     ################################################################################################
 
-    def _check_events(self):
-        """Respond to keypresses and mouse events"""
-        for event in pygame.event.get():
+    def _check_events(self, idle=False):
+        """
+        Respond to keypresses, mouse and window events. If idle, sleep
+        until there is an event instead of returning right away
+        """
+        events = wait_events(self._get_idle_timeout()) if idle else pygame.event.get()
+        for event in events:
+            if event.type in REDRAW_EVENTS:
+                self.needs_redraw = True
+                self.renderer.invalidate()
+            if event.type in FOCUS_LOST_EVENTS:
+                self._focus_lost()
+            elif event.type in FOCUS_GAINED_EVENTS:
+                self.has_focus = True
+            elif event.type in (pygame.KEYDOWN, pygame.KEYUP, pygame.MOUSEBUTTONDOWN):
+                self.needs_redraw = True
+
             if event.type == pygame.QUIT:
                 self._exit_game()
                 sys.exit()
@@ -297,7 +516,7 @@ class AlienInvasion:
             elif event.type == pygame.KEYUP:
                 self._check_keyup_events(event)
             elif event.type == pygame.MOUSEBUTTONDOWN:
-                mouse_pos = pygame.mouse.get_pos()
+                mouse_pos = window.scene_pos(event.pos)
                 if not self.stats.game_active:
                     if self.stats.game_end:
                         restart = self._check_end_button(mouse_pos)
@@ -314,31 +533,90 @@ class AlienInvasion:
         """Respond to keypresses"""
 
         # Game actions.
-        if event.key == pygame.K_RIGHT and self.stats.game_active:
-            self.ship.moving_right = True
-        elif event.key == pygame.K_LEFT and self.stats.game_active:
-            self.ship.moving_left = True
-        elif event.key == pygame.K_SPACE and self.stats.game_active:
-            self._fire_bullet()
+        if event.key == pygame.K_RIGHT:
+            self._apply(MOVE_RIGHT)
+        elif event.key == pygame.K_LEFT:
+            self._apply(MOVE_LEFT)
+        elif event.key == pygame.K_SPACE:
+            self._apply(FIRE)
 
         # Start-stop game.
         elif event.key == pygame.K_q:
             return self._exit_game()
         elif event.key == pygame.K_s:
-            if not self.stats.game_active and not self.stats.game_end:
-                self._start_game()
+            self._apply(START)
         elif event.key == pygame.K_p:
-            if self.stats.game_active and not self.stats.game_pause:
-                self._pause_game()
-            elif self.stats.game_pause:
-                self._resume_game()
+            self._apply(PAUSE)
+
+        # Frame timing overlay.
+        elif event.key == pygame.K_F3:
+            self._toggle_frame_timing()
 
     def _check_keyup_events(self, event):
         """Respond to key releases"""
         if event.key == pygame.K_RIGHT:
-            self.ship.moving_right = False
+            self._apply(STOP_RIGHT)
         elif event.key == pygame.K_LEFT:
-            self.ship.moving_left = False
+            self._apply(STOP_LEFT)
+
+    def _apply(self, command):
+        """Send an input command to the game engine and respond to its outcome"""
+        if self.recorder:
+            self.recorder.record(self.engine.tick, command)
+        resumed = self.engine.saved_game
+        self.engine.apply(command)
+        if self.record_traces and "start" in self.engine.events:
+            self._start_trace(resumed)
+        self._check_engine_events()
+
+    def _start_trace(self, resumed):
+        """
+        Start the input trace of the game that just started. A resumed saved game
+        is replayed from its state
+        """
+        self._close_trace()
+        saved_game = self._get_current_game_data() if resumed else None
+
+        # One file per game, even for games started within the same second.
+        date = datetime.now().strftime("%Y-%m-%d_%H-%M-%S")
+        filename = self.path + f"user_data/traces/{date}.trace"
+        number = 1
+        while os.path.exists(filename):
+            number += 1
+            filename = self.path + f"user_data/traces/{date}_{number}.trace"
+
+        self.recorder = TraceRecorder(
+            filename,
+            self.engine,
+            self.screen_size,
+            saved_game,
+        )
+
+        # The trace starts with the command that started the game, and the keys still
+        # held from the last game.
+        tick = self.engine.tick
+        self.recorder.record(tick, START)
+        if self.engine.ship.moving_right:
+            self.recorder.record(tick, MOVE_RIGHT)
+        if self.engine.ship.moving_left:
+            self.recorder.record(tick, MOVE_LEFT)
+
+    def _close_trace(self):
+        """Finish the input trace of the current game, if it is recorded"""
+        if self.recorder:
+            self.recorder.close(self.engine.tick)
+            self.recorder = None
+
+    def _toggle_frame_timing(self):
+        """
+        Show or hide the frame timing overlay. The first time, start timing the
+        frames, which then goes on until the end of the game (for the CSV file)
+        """
+        if self.frame_timer is None:
+            self._start_frame_timing()
+        else:
+            self.frame_timer.show_overlay = not self.frame_timer.show_overlay
+        self.needs_redraw = True
 
     def _check_end_button(self, mouse_pos):
         """
@@ -349,6 +627,7 @@ class AlienInvasion:
         if end_clicked:
             # Play sound of clicked buttom.
             self.click_sound.play()
+            self._close_recordings()
             return "restart"
 
     def _check_play_button(self, mouse_pos):
@@ -357,7 +636,7 @@ class AlienInvasion:
         if play_clicked:
             # Play sound of clicked buttom.
             self.click_sound.play()
-            self._start_game()
+            self._apply(START)
 
     def _check_pause_buttons(self, mouse_pos):
         """Resume the game when the player clicks Resume"""
@@ -371,7 +650,7 @@ class AlienInvasion:
             save_clicked = None
 
         if resume_clicked:
-            self._resume_game()
+            self._apply(PAUSE)
         elif save_clicked:
             return self._save_game()
         elif quit_clicked:
@@ -383,40 +662,69 @@ class AlienInvasion:
     # Start-stop game functions
     ################################################################################################
 
+    def _check_engine_events(self):
+        """Play the sounds and update the images for what happened in the game engine"""
+        for event in self.engine.events:
+            if event == "start":
+                self._start_game()
+            elif event == "pause":
+                self._pause_game()
+            elif event == "resume":
+                self._resume_game()
+            elif event == "laser":
+                # Play sound of firing a bullet (skipped from the QUIET level down).
+                if self.governor.level < QUIET:
+                    self.laser_sound.play()
+            elif event == "fail_shot":
+                # Play sound of misfired bullet (skipped from the QUIET level down).
+                if self.governor.level < QUIET:
+                    self.fail_shot.play()
+            elif event == "score":
+                if self.governor.level >= SLOW_HUD:
+                    self.hud_pending = True
+                else:
+                    self.sb.prep_score()
+                    self.sb.prep_rank()
+            elif event == "high_score":
+                if self.governor.level >= SLOW_HUD:
+                    self.hud_pending = True
+                else:
+                    self.sb.prep_high_score()
+            elif event == "level":
+                self.sb.prep_level()
+            elif event == "ships":
+                self.sb.prep_ships()
+                self.sb.prep_rank()
+            elif event == "ship_hit":
+                self._ship_hit()
+            elif event == "next_ship":
+                self._next_ship()
+            elif event == "game_over":
+                self._close_trace()
+                self._game_over()
+            elif event == "game_won":
+                self._close_trace()
+                self._show_won_game_message()
+        self.engine.events.clear()
+
     def _start_game(self):
-        """Starts a new game"""
+        """Set up the screen and sounds for a game that just started"""
 
         # Play ambient sound for the game.
         self.ambient_sound.play(loops=-1, fade_ms=500)
 
-        if not self.saved_game:
+        # Set scoring images.
+        self.sb.prep_images()
 
-            # Reset the game statistics.
-            self.stats.reset_stats()
-
-            # Reset the game settings.
-            self.settings.initialize_dynamic_settings(self.ini_diff)
-
-            # Set scoring images.
-            self.sb.prep_images()
-
-            # Get rid of any remaining aliens and bullets.
-            self.aliens.empty()
-            self.bullets.empty()
-
-            # Create a new fleet and center the ship.
-            self._create_fleet()
-            self.ship.center_ship()
-
-        # Starts game.
-        self.stats.game_active = True
+        # Forget the delayed actions of the last game (e.g. showing the mouse cursor
+        # after the game over), so they don't run during this one.
+        self.scheduler.clear()
 
         # Hide the mouse cursor.
         pygame.mouse.set_visible(False)
 
     def _resume_game(self):
         """Resume game after being paused"""
-        self.stats.game_pause = False
 
         # Play sound of clicked buttom.
         self.click_sound.play()
@@ -437,60 +745,25 @@ class AlienInvasion:
         # Save game.
         saved_game = self._get_current_game_data()
 
-        # Store saved game.
-        try:
-            with open(self.saved_games_filename) as f:
-                saved_games = json.load(f)
-        except FileNotFoundError:
-            saved_games = {}
-        saved_games[key] = saved_game
-
-        # Sort the whole list of saved games by user first, and then date.
-        with open(self.saved_games_filename, "w") as f:
-            sorted_saved_games = {
-                k: v
-                for k, v in sorted(
-                    saved_games.items(),
-                    key=lambda item: (item[1]["user"], item[1]["date"]),
-                )
-            }
-            json.dump(sorted_saved_games, f)
+        # Store saved game (the other saved games are not read or written).
+        self.save_store.save(key, saved_game)
 
         # Quit game.
         return self._exit_game()
 
     def _get_current_game_data(self):
         """Get all the data that defines the current state of the game"""
-        aliens_data = []
-        for alien in self.aliens.sprites():
-            alien_data = {
-                "x": alien.x,
-                "y": alien.rect.y,
-            }
-            aliens_data.append(alien_data)
-
-        saved_game = {
-            # Scores.
-            "high_score": self.stats.high_score,
-            "ship_left": self.stats.ships_left,
-            "current_score": self.stats.score,
-            "level": self.stats.level,
-            # Configuration.
-            "user": self.user,
-            "ini_diff": self.ini_diff,
-            "screen_size": self.screen_size,
-            # Speeds.
-            "ship_speed": self.settings.ship_speed,
-            "bullet_speed": self.settings.bullet_speed,
-            "alien_speed": self.settings.alien_speed,
-            "alien_points": self.settings.alien_points,
-            "fleet_direction": self.settings.fleet_direction,
-            # Screen state.
-            "ship_x": self.ship.x,
-            "aliens": aliens_data,
-            # Date (used to sort the saved games by user and date).
-            "date": float(datetime.now().timestamp() * 1000),
-        }
+
+        # Scores, speeds and screen state.
+        saved_game = self.engine.get_state()
+
+        # Configuration.
+        saved_game["user"] = self.user
+        saved_game["ini_diff"] = self.ini_diff
+        saved_game["screen_size"] = self.screen_size
+
+        # Date (used to sort the saved games by user and date).
+        saved_game["date"] = float(datetime.now().timestamp() * 1000)
 
         return saved_game
 
@@ -502,34 +775,49 @@ class AlienInvasion:
 
         pygame.mouse.set_visible(True)
 
-        self.stats.game_active = False
-        self.stats.game_end = False
+        # Forget the delayed actions of this game.
+        self.scheduler.clear()
+
+        self.engine.stop()
+        self._close_recordings()
 
         if self.user != "anon":
-            with open(self.high_scores_filename) as f:
-                user_scores = json.load(f)
-            past_high_score = user_scores[self.user]["high_score"]
+            past_high_score = self.score_store.get_high_score(self.user)
 
+            # Only this user's row is written.
             if self.stats.score >= past_high_score:
-                user_scores[self.user]["high_score"] = self.stats.high_score
-                user_scores[self.user]["lives_left"] = self.stats.ships_left + 1
-                user_scores[self.user]["max_level"] = self.stats.level
-                user_scores[self.user]["date"] = datetime.now().strftime(
-                    "%Y-%m-%d, %H:%M:%S"
+                self.score_store.set_score(
+                    self.user,
+                    self.stats.high_score,
+                    self.stats.ships_left + 1,
+                    self.stats.level,
+                    datetime.now(),
                 )
 
-            with open(self.high_scores_filename, "w") as f:
-                json.dump(user_scores, f)
-
         return "restart"
 
+    def _close_recordings(self):
+        """Finish the input trace and write the frame times, if they are recorded"""
+        self._close_trace()
+
+        if self.frame_timer and self.frame_timer.frames:
+            filename = datetime.now().strftime("%Y-%m-%d_%H-%M-%S") + ".csv"
+            self.frame_timer.write_csv(self.path + "user_data/frame_times/" + filename)
+
+    def _focus_lost(self):
+        """Stop simulating and drawing while the window is not focused"""
+        self.has_focus = False
+
+        # Pause a running game, so the player comes back to the pause menu.
+        if self.stats.game_active and not self.stats.game_pause:
+            self._apply(PAUSE)
+
     def _pause_game(self):
         """Pause game"""
 
         # Stop ambient sound.
         self.ambient_sound.fadeout(500)
 
-        self.stats.game_pause = True
         pygame.mouse.set_visible(True)
 
     def _show_won_game_message(self):
@@ -542,92 +830,10 @@ class AlienInvasion:
         pygame.display.flip()
         pygame.mouse.set_visible(True)
         self.game_won_sound.play()
-        self.stats.game_active = False
-        self.stats.game_end = True
-
-    ########################################################################################
-    # Game logic and actions functions
-    ########################################################################################
-
-    def _fire_bullet(self):
-        """Create a new bullet and add it to the bullets group"""
-        if len(self.bullets) < self.settings.bullets_allowed:
-            new_bullet = Bullet(self)
-            self.bullets.add(new_bullet)
-            # Play sound of firing a bullet.
-            self.laser_sound.play()
-        else:
-            # Play sound of misfired bullet.
-            self.fail_shot.play()
-
-    def _update_bullets(self):
-        """Update position of bullets and get rid of old bullets"""
-        # Update bullet positions.
-        self.bullets.update()
-
-        # Get rid of bullets that have disappeared.
-        for bullet in self.bullets.copy():
-            if bullet.rect.bottom <= 0:
-                self.bullets.remove(bullet)
 
-        self._check_bullet_alien_collisions()
-
-    def _check_bullet_alien_collisions(self):
-        """Respond to bullet-alien collisions"""
-
-        # Remove any bullets and aliens that have collided.
-        collisions = pygame.sprite.groupcollide(self.bullets, self.aliens, True, True)
-
-        # If a collision occurred, update scores.
-        if collisions:
-            for aliens in collisions.values():
-                self.stats.score += self.settings.alien_points * len(aliens)
-            self.sb.prep_score()
-            self.sb.check_high_score()
-
-        # If there are no more aliens start a new level.
-        if not self.aliens:
-            self._start_new_level()
-
-    def _start_new_level(self):
-        """Go to next level"""
-
-        # Destroy existing bullets, create new fleet and increase speed.
-        self.bullets.empty()
-        self._create_fleet()
-        self.settings.increase_speed()
-
-        # Increase level.
-        self.stats.level += 1
-        self.sb.prep_level()
-
-    def _update_aliens(self):
-        """
-        Check if the fleet is at an edge, update the positions of all aliens in the fleet
-        and check for alien collisions.
-        """
-        self._check_fleet_edges()
-        self.aliens.update()
-
-        # Look for alien-ship collisions.
-        if pygame.sprite.spritecollideany(self.ship, self.aliens):
-            self._ship_hit()
-
-        # Look for aliens hitting the bottom of the screen.
-        self._check_aliens_bottom()
-
-    def _check_fleet_edges(self):
-        """Respond appropriately if any aliens have reached an edge"""
-        for alien in self.aliens.sprites():
-            if alien.check_edges():
-                self._change_fleet_direction()
-                break
-
-    def _change_fleet_direction(self):
-        """Drop the entire fleet and change the fleet's direction"""
-        for alien in self.aliens.sprites():
-            alien.rect.y += self.settings.fleet_drop_speed
-        self.settings.fleet_direction *= -1
+    ################################################################################################
+    # Game events functions
+    ################################################################################################
 
     def _ship_hit(self):
         """Respond to the ship being hit by an alien"""
@@ -638,52 +844,54 @@ class AlienInvasion:
         # Stop ambient sound.
         self.ambient_sound.fadeout(500)
 
-        if self.stats.ships_left > 0:
-            self._next_ship()
-        else:
-            self.stats.game_active = False
-            # Pause.
-            sleep(0.8)
-            # Show that the last ship was lost.
-            self.stats.ships_left -= 1
-            self.sb.prep_ships()
-
-            pygame.mouse.set_visible(True)
-
     def _next_ship(self):
         """Restart game after losing one ship"""
 
-        # Decrement ships_left.
-        self.stats.ships_left -= 1
-        self.sb.prep_ships()
-
-        # Get rid of any remaining aliens and bullets.
-        self.aliens.empty()
-        self.bullets.empty()
-
-        # Create a new fleet and center the ship.
-        self._create_fleet()
-        self.ship.center_ship()
-
-        # Pause.
-        sleep(0.8)
+        # Pause the game logic, then restart ambient sound.
+        self.scheduler.schedule(
+            self.settings.ship_lost_delay,
+            lambda: self.ambient_sound.play(loops=-1, fade_ms=500),
+            hold=True,
+        )
 
-        # Restart ambient sound.
-        self.ambient_sound.play(loops=-1, fade_ms=500)
+    def _game_over(self):
+        """Respond to the last ship being lost"""
 
-    def _check_aliens_bottom(self):
-        """Check if any aliens have reached the bottom of the screen"""
-        for alien in self.aliens.sprites():
-            if alien.rect.bottom >= self.screen_rect.bottom:
-                # Treat this the same as if the ship got hit.
-                self._ship_hit()
-                break
+        # Pause, then show the mouse cursor.
+        self.scheduler.schedule(
+            self.settings.ship_lost_delay, lambda: pygame.mouse.set_visible(True)
+        )
 
 
 ####################################################################################################
 # Main
 ####################################################################################################
 
+
+def replay_trace_file(filename, main_path, render=False):
+    """
+    Replay an input trace file (without a window, unless render is True),
+    and print the checksum of the final state and how long the replay took
+    """
+    with open(filename, "rb") as f:
+        trace = load_trace(f.read())
+
+    start = time.perf_counter()
+    if render:
+        configuration = (
+            "anon",
+            tuple(trace.ini_diff),
+            trace.screen_size,
+            trace.saved_game,
+        )
+        checksum = AlienInvasion(configuration, main_path).replay_trace(trace)
+    else:
+        checksum = replay(trace, make_engine(trace, main_path))
+    elapsed = time.perf_counter() - start
+
+    print(f"{checksum}  {trace.end_tick} ticks in {elapsed:.3f} s")
+
+
 if __name__ == "__main__":
 
     if getattr(sys, "frozen", False):
@@ -702,6 +910,15 @@ if __name__ == "__main__":
         # Create `src/user_data` folder if it does not exist.
         Path("src/user_data").mkdir(parents=True, exist_ok=True)
 
+    # Replay an input trace instead of playing.
+    if "--replay-trace" in sys.argv:
+        filename = sys.argv[sys.argv.index("--replay-trace") + 1]
+        replay_trace_file(filename, main_path, render="--render" in sys.argv)
+        sys.exit()
+
+    # Load the game assets in the background while the menus are shown.
+    startup.defer(AlienInvasion.preload_assets, main_path)
+
     while True:
 
         configuration = conff_menu(main_path)
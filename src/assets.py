@@ -0,0 +1,275 @@
+from concurrent.futures import ThreadPoolExecutor
+
+import pygame
+
+from startup import startup
+
+
+class AssetRegistry:
+    """Process-wide registry that loads every game asset once and shares it"""
+
+    def __init__(self):
+        """Initialize the empty caches"""
+
+        # Loaded images, keyed by (filename, alpha).
+        self._images = {}
+
+        # Keys of images loaded before a display existed (not converted yet).
+        self._unconverted = set()
+
+        # Font objects, keyed by (filename, size) or (name, size) for system fonts.
+        self._fonts = {}
+        self._sys_fonts = {}
+
+        # Pre-rendered surfaces (e.g. fully composed buttons), keyed by their inputs.
+        self._rendered = {}
+
+        # Decoded sounds and the size in bytes of their PCM data, keyed by filename.
+        self._sounds = {}
+        self._sound_bytes = {}
+
+        # Did starting the audio device fail? (then sounds are silent)
+        self._no_mixer = False
+
+        # Files being loaded in the background, keyed by ("image" or "sound", filename),
+        # and the worker threads loading them (started by the first preload).
+        self._pending = {}
+        self._workers = None
+
+    ################################################################################################
+    # Images
+    ################################################################################################
+
+    def image(self, filename, alpha=False):
+        """
+        Return the shared surface for an image file, loading it on first use.
+        The surface is converted to the display pixel format once a display exists
+        """
+        key = (filename, alpha)
+        image = self._images.get(key)
+
+        if image is None:
+            image = self._collect("image", filename)
+            if image is None:
+                with startup.timed("load images"):
+                    image = pygame.image.load(filename)
+            self._unconverted.add(key)
+
+        if key in self._unconverted and self.has_display():
+            # Convert to the display pixel format, so blits don't convert on every frame.
+            image = image.convert_alpha() if alpha else image.convert()
+            self._unconverted.discard(key)
+
+        self._images[key] = image
+        return image
+
+    ################################################################################################
+    # Fonts and rendered surfaces
+    ################################################################################################
+
+    def font(self, filename, size):
+        """Return the shared Font object for a font file and size"""
+        key = (filename, size)
+        font = self._fonts.get(key)
+        if font is None:
+            self._init_font()
+            with startup.timed("load fonts"):
+                font = self._fonts[key] = pygame.font.Font(filename, size)
+        return font
+
+    def sys_font(self, name, size):
+        """Return the shared Font object for a system font and size"""
+        key = (name, size)
+        font = self._sys_fonts.get(key)
+        if font is None:
+            self._init_font()
+            with startup.timed("load system fonts"):
+                font = self._sys_fonts[key] = pygame.font.SysFont(name, size)
+        return font
+
+    def rendered(self, key, render):
+        """
+        Return the cached surface for key, calling render() to build it on first use.
+        The key must contain every input that changes how the surface looks
+        """
+        surface = self._rendered.get(key)
+        if surface is None:
+            with startup.timed("render surfaces"):
+                surface = self._rendered[key] = render()
+        return surface
+
+    ################################################################################################
+    # Sounds
+    ################################################################################################
+
+    def sound(self, filename, volume=None):
+        """
+        Return a handle for a sound effect. The file is decoded the first time
+        any handle for it is played, and only once per process
+        """
+        return LazySound(self, filename, volume)
+
+    def decoded_sound(self, filename):
+        """Return the shared Sound object for a sound file, decoding it on first use"""
+        sound = self._sounds.get(filename)
+        if sound is None:
+            sound = self._collect("sound", filename)
+            if sound is None:
+                with startup.timed("decode sounds"):
+                    sound = pygame.mixer.Sound(filename)
+            self._sounds[filename] = sound
+
+            # Size of the decoded samples: seconds * frequency * channels * bytes per sample.
+            frequency, size, channels = pygame.mixer.get_init()
+            self._sound_bytes[filename] = int(
+                sound.get_length() * frequency * channels * (abs(size) // 8)
+            )
+        return sound
+
+    def loaded_sound(self, filename):
+        """Return the Sound object for a sound file if it was already decoded, else None"""
+        return self._sounds.get(filename)
+
+    def sound_memory(self):
+        """Return the number of bytes of decoded PCM data held by the sound bank"""
+        return sum(self._sound_bytes.values())
+
+    ################################################################################################
+    # Preloading
+    ################################################################################################
+
+    def preload(self, images=(), sounds=(), workers=2):
+        """
+        Start loading image and sound files on worker threads, e.g. while the menus
+        are shown. The results are collected by image() and decoded_sound() when the
+        files are first used, and anything not loaded by then is loaded right there.
+        Only the loading runs in the background: images are converted to the display
+        format, and fonts loaded and text rendered, on the main thread as before
+        """
+        if self._workers is None:
+            self._workers = ThreadPoolExecutor(workers, thread_name_prefix="preload")
+
+        for filename in images:
+            if not any(key[0] == filename for key in self._images):
+                self._submit("image", filename, pygame.image.load)
+
+        # Sounds can only be decoded once the audio device is started.
+        if sounds and self.init_mixer():
+            for filename in sounds:
+                if filename not in self._sounds:
+                    self._submit("sound", filename, pygame.mixer.Sound)
+
+    def _submit(self, kind, filename, load):
+        """Load a file on a worker thread, unless it is already being loaded"""
+        if (kind, filename) not in self._pending:
+            self._pending[(kind, filename)] = self._workers.submit(load, filename)
+
+    def _collect(self, kind, filename):
+        """
+        Return the preloaded image or sound of a file, waiting for it if it is being
+        loaded. Return None if it has to be loaded by the caller: it wasn't preloaded,
+        the load didn't start yet, or it failed (loading it again raises the error)
+        """
+        future = self._pending.pop((kind, filename), None)
+        if future is None or future.cancel():
+            return None
+
+        try:
+            return future.result()
+        except (pygame.error, OSError):
+            return None
+
+    ################################################################################################
+    # Subsystems
+    ################################################################################################
+
+    # pygame.init() would start every subsystem (joystick included), so each one the
+    # game uses is started when it is first needed instead.
+
+    @staticmethod
+    def _init_font():
+        """Start the font subsystem, the first time a font is loaded"""
+        if not pygame.font.get_init():
+            with startup.timed("init font"):
+                pygame.font.init()
+
+    def init_mixer(self):
+        """
+        Start the audio device, the first time a sound is played.
+        Return False if there is no audio device
+        """
+        if not pygame.mixer.get_init() and not self._no_mixer:
+            try:
+                with startup.timed("init mixer"):
+                    pygame.mixer.init()
+            except pygame.error:
+                self._no_mixer = True
+
+        return not self._no_mixer
+
+    ################################################################################################
+    # Auxiliary functions
+    ################################################################################################
+
+    def clear(self):
+        """Drop every cached asset"""
+        self._images.clear()
+        self._unconverted.clear()
+        self._fonts.clear()
+        self._sys_fonts.clear()
+        self._rendered.clear()
+        self._sounds.clear()
+        self._sound_bytes.clear()
+        for future in self._pending.values():
+            future.cancel()
+        self._pending.clear()
+
+    @staticmethod
+    def has_display():
+        """Return True if there is a display surface to convert images to"""
+        return pygame.display.get_init() and pygame.display.get_surface() is not None
+
+
+class LazySound:
+    """A sound effect handle that is only decoded when it is first played"""
+
+    def __init__(self, registry, filename, volume=None):
+        """Store where to get the sound from, without decoding it"""
+        self.registry = registry
+        self.filename = filename
+        self.volume = volume
+
+    def _get(self):
+        """Return the decoded sound, or None if there is no audio device"""
+        if not self.registry.init_mixer():
+            return None
+        sound = self.registry.decoded_sound(self.filename)
+        if self.volume is not None:
+            sound.set_volume(self.volume)
+        return sound
+
+    def play(self, *args, **kwargs):
+        """Play the sound, decoding it first if needed"""
+        sound = self._get()
+        if sound is not None:
+            sound.play(*args, **kwargs)
+
+    def fadeout(self, time):
+        """Fade out the sound. If it was never decoded it isn't playing, so do nothing"""
+        sound = self.registry.loaded_sound(self.filename)
+        if sound is not None:
+            sound.fadeout(time)
+
+    def stop(self):
+        """Stop the sound if it is playing"""
+        sound = self.registry.loaded_sound(self.filename)
+        if sound is not None:
+            sound.stop()
+
+    def set_volume(self, volume):
+        """Set the playback volume, applied when the sound is played"""
+        self.volume = volume
+
+
+# Shared registry for the whole process.
+assets = AssetRegistry()
@@ -0,0 +1,293 @@
+import os
+
+# Benchmarks don't need a window or an audio device (set them before pygame starts).
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+
+import argparse
+import json
+import platform
+import random
+import tempfile
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+
+import numpy as np
+import pygame
+
+from alien_invasion import AlienInvasion
+from engine import START
+from ranking import RankingIndex, sort_scores
+from save_store import SaveStore
+from score_store import JsonScoreStore
+from window import window
+
+####################################################################################################
+# Benchmarks of the per-frame hot paths
+####################################################################################################
+
+# Run with `python src/benchmark.py`, see --help for the options. Every benchmark
+# times single calls, so the results are per call percentiles (in microseconds).
+# The game is built at each screen geometry below, with a fleet as big as fits.
+
+GEOMETRIES = {
+    "Small Screen": (800, 705),
+    # Full screen on a 1080p desktop.
+    "Full Screen": (1920, 1080),
+    "4K": (3840, 2160),
+    "8K": (7680, 4320),
+}
+
+# Hard difficulty: (alien speed, bullet speed, ship speed) in pixels per second.
+DIFFICULTY = (240, 480, 300)
+
+# Number of users in the ranking, for the ranking benchmarks.
+RANKING_SIZES = (100, 10_000)
+
+
+class BenchmarkGame(AlienInvasion):
+    """
+    The game on a screen of any size, started and with unlimited ships. Its scores
+    and saved games are kept in a given folder, away from the user data of the game
+    """
+
+    def __init__(self, geometry, main_path, data_path):
+        """Start a game on a screen of the given (width, height)"""
+        self.geometry = geometry
+        self.data_path = data_path
+        super().__init__(("anon", DIFFICULTY, "Small Screen", None), main_path)
+
+        # Start the game logic (the front end would only start the ambient sound).
+        self.engine.apply(START)
+        self.engine.events.clear()
+        self.stats.ships_left = 10**9
+        self.settings.set_rapid_fire(True)
+
+    def _open_stores(self):
+        """Use stores in the benchmark folder instead of the user data"""
+        return (
+            JsonScoreStore(os.path.join(self.data_path, "high_scores.json")),
+            SaveStore(os.path.join(self.data_path, "saved_games")),
+        )
+
+    def _open_scene(self):
+        """Use the benchmark geometry instead of the configured screen size"""
+        self.settings.screen_width, self.settings.screen_height = self.geometry
+        return window.open_scene(self.geometry, "Alien Invasion benchmark")
+
+
+def run_benchmarks(main_path, calls, seed=0):
+    """Run every benchmark, and return their results by name"""
+    results = {}
+    rng = random.Random(seed)
+
+    for geometry_name, geometry in GEOMETRIES.items():
+        with tempfile.TemporaryDirectory() as directory:
+            game = BenchmarkGame(geometry, main_path, directory)
+            for name, function, setup in _get_game_benchmarks(game, rng):
+                times = _time_calls(function, calls, setup)
+                results[f"{geometry_name}/{name}"] = _summarize(times)
+                _print_result(
+                    f"{geometry_name}/{name}", results[f"{geometry_name}/{name}"]
+                )
+
+            # The saved game of a big fleet is bigger.
+            store = game.save_store
+            saved_game = game._get_current_game_data()
+            for name, function in [
+                ("save_store.save", lambda: store.save("bench", saved_game)),
+                ("save_store.load", lambda: store.load("bench")),
+            ]:
+                times = _time_calls(function, calls)
+                results[f"{geometry_name}/{name}"] = _summarize(times)
+                _print_result(
+                    f"{geometry_name}/{name}", results[f"{geometry_name}/{name}"]
+                )
+
+    for n in RANKING_SIZES:
+        score_dict = _get_score_dict(n, rng)
+        for name, function in [
+            ("ranking.sort_scores", lambda: sort_scores(score_dict)),
+            ("RankingIndex", lambda: RankingIndex(sort_scores(score_dict))),
+        ]:
+            times = _time_calls(function, max(calls // 10, 1))
+            results[f"{n} users/{name}"] = _summarize(times)
+            _print_result(f"{n} users/{name}", results[f"{n} users/{name}"])
+
+    return results
+
+
+def _get_game_benchmarks(game, rng):
+    """
+    Returns the benchmarks of a game as (name, function, setup), where setup
+    (not timed) puts the game in the state to time the next call of function
+    """
+    engine = game.engine
+    tick_time = game.settings.tick_time
+    stats = game.stats
+    sb = game.sb
+
+    def fire():
+        # Bullets from all over the screen, so some hit the fleet.
+        engine.ship.rect.x = rng.randrange(game.screen_rect.width)
+        engine.bullets.fire()
+        engine.events.clear()
+
+    def move_bullets():
+        fire()
+        engine.bullets.update(tick_time)
+
+    def step():
+        engine.step(tick_time)
+        engine.events.clear()
+
+    def more_score():
+        stats.score += 10
+        stats.high_score = stats.score
+
+    def other_ships():
+        stats.ships_left = rng.randrange(1, 4)
+
+    def next_level():
+        stats.level += 1
+
+    # Ranking of the players, to place the score in.
+    sb.ranking = RankingIndex(sort_scores(_get_score_dict(RANKING_SIZES[-1], rng)))
+
+    return [
+        ("engine._create_fleet", engine._create_fleet, None),
+        ("engine._update_aliens", lambda: engine._update_aliens(tick_time), step),
+        ("engine._update_bullets", lambda: engine._update_bullets(tick_time), fire),
+        (
+            "engine._check_bullet_alien_collisions",
+            engine._check_bullet_alien_collisions,
+            move_bullets,
+        ),
+        ("AlienInvasion._update_screen", game._update_screen, step),
+        ("Scoreboard.prep_score", sb.prep_score, more_score),
+        ("Scoreboard.prep_high_score", sb.prep_high_score, more_score),
+        ("Scoreboard.prep_level", sb.prep_level, next_level),
+        ("Scoreboard.prep_ships", sb.prep_ships, other_ships),
+        ("Scoreboard.prep_rank", sb.prep_rank, more_score),
+    ]
+
+
+####################################################################################################
+# Comparison of results
+####################################################################################################
+
+
+def compare(results, baseline):
+    """Print the median time of each benchmark against a baseline run"""
+    print(f"\n{'benchmark':<60}{'base p50':>12}{'p50':>12}{'change':>9}")
+    for name, summary in results.items():
+        if name not in baseline:
+            continue
+        base = baseline[name]["p50_us"]
+        p50 = summary["p50_us"]
+        change = f"{(p50 / base - 1) * 100:+.1f}%" if base else "-"
+        print(f"{name:<60}{base:>12.1f}{p50:>12.1f}{change:>9}")
+
+
+####################################################################################################
+# Auxiliary functions
+####################################################################################################
+
+
+def _time_calls(function, calls, setup=None):
+    """Returns the time (in seconds) of each call, running setup() untimed before it"""
+    times = []
+    perf_counter = time.perf_counter
+    for _ in range(calls):
+        if setup is not None:
+            setup()
+        start = perf_counter()
+        function()
+        times.append(perf_counter() - start)
+    return times
+
+
+def _summarize(times):
+    """Returns the number of calls and the percentiles of their times, in microseconds"""
+    times = np.array(times) * 1e6
+    p50, p90, p99 = np.percentile(times, [50, 90, 99])
+    return {
+        "calls": len(times),
+        "mean_us": float(times.mean()),
+        "min_us": float(times.min()),
+        "p50_us": float(p50),
+        "p90_us": float(p90),
+        "p99_us": float(p99),
+        "max_us": float(times.max()),
+    }
+
+
+def _print_result(name, summary):
+    """Prints a row of the results table"""
+    print(
+        f"{name:<60}"
+        f"{summary['p50_us']:>12.1f}{summary['p90_us']:>12.1f}{summary['p99_us']:>12.1f}"
+    )
+
+
+def _get_score_dict(n, rng):
+    """Returns the scores of n made up users, in the format of the JSON score file"""
+    start = datetime(2020, 1, 1)
+    return {
+        f"user_{i}": {
+            "high_score": rng.randrange(0, 100_000, 10),
+            "lives_left": rng.randrange(0, 4),
+            "max_level": rng.randrange(1, 51),
+            "date": (start + timedelta(minutes=rng.randrange(10**6))).strftime(
+                "%Y-%m-%d, %H:%M:%S"
+            ),
+        }
+        for i in range(n)
+    }
+
+
+def _get_environment():
+    """Returns what the results depend on, besides the code"""
+    return {
+        "date": datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "pygame": pygame.version.ver,
+        "numpy": np.__version__,
+        "platform": platform.platform(),
+        "processor": platform.processor(),
+        "video_driver": os.environ["SDL_VIDEODRIVER"],
+    }
+
+
+####################################################################################################
+# Main
+####################################################################################################
+
+if __name__ == "__main__":
+
+    parser = argparse.ArgumentParser(
+        description="Time the per-frame hot paths of the game at several screen sizes."
+    )
+    parser.add_argument("--calls", type=int, default=100, help="calls per benchmark")
+    parser.add_argument("--output", help="write the results to this JSON file")
+    parser.add_argument(
+        "--compare", help="JSON results of a previous run to compare to"
+    )
+    args = parser.parse_args()
+
+    # Same assets as the game (the user data is never touched).
+    main_path = str(Path(__file__).parent) + "/"
+
+    print(f"{'benchmark (us per call)':<60}{'p50':>12}{'p90':>12}{'p99':>12}")
+    results = run_benchmarks(main_path, args.calls)
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(
+                {"environment": _get_environment(), "results": results}, f, indent=4
+            )
+
+    if args.compare:
+        with open(args.compare) as f:
+            compare(results, json.load(f)["results"])
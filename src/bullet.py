@@ -1,39 +1,118 @@
+import numpy as np
 import pygame
-from pygame.sprite import Sprite
 
 
-class Bullet(Sprite):
-    """A class to manage bullets fired from the ship"""
+class Bullets:
+    """
+    A class to manage the bullets fired from the ship.
 
-    def __init__(self, ai_game):
-        """Create a bullet object at the ship's current position"""
+    The bullets are stored as arrays (one per attribute) of the live bullets,
+    so moving, culling and building the rects of all of them are single
+    vectorised operations no matter how many are on the screen.
+    """
 
-        super().__init__()
+    def __init__(self, ai_game):
+        """Create an empty set of bullets"""
 
         # Load game assets and data.
-        self.screen = ai_game.screen
         self.settings = ai_game.settings
+        self.ship = ai_game.ship
+        self.width = self.settings.bullet_width
+        self.height = self.settings.bullet_height
         self.color = self.settings.bullet_color
 
-        # Set initial position of bullet.
-        self.rect = pygame.Rect(
-            0, 0, self.settings.bullet_width, self.settings.bullet_height
+        # Horizontal position and exact vertical position (as a decimal value) of the
+        # top left corner of each bullet. Only the first self.count entries are live.
+        self.capacity = max(self.settings.bullets_allowed, 1)
+        self.x = np.zeros(self.capacity, dtype=np.int64)
+        self.y = np.zeros(self.capacity, dtype=np.float64)
+        self.count = 0
+
+    def fire(self):
+        """Create a bullet at the ship's current position"""
+        if self.count == self.capacity:
+            self._grow()
+
+        # Same position as a bullet rect with its midtop at the ship's midtop.
+        self.x[self.count] = self.ship.rect.centerx - self.width // 2
+        self.y[self.count] = self.ship.rect.top
+        self.count += 1
+
+    def update(self, dt):
+        """Move the bullets up the screen, and get rid of the ones that disappeared"""
+        n = self.count
+        if not n:
+            return
+
+        # Update the decimal position of the bullets.
+        self.y[:n] -= self.settings.bullet_speed * dt
+
+        # Keep the bullets whose bottom is still on the screen.
+        keep = self.y[:n].astype(np.int64) + self.height > 0
+        if not keep.all():
+            self._keep(keep)
+
+    def overlapping(self, rect):
+        """Return the indices of the bullets that overlap rect"""
+        n = self.count
+        x = self.x[:n]
+        y = self.y[:n].astype(np.int64)
+        mask = (
+            (x < rect.right)
+            & (x + self.width > rect.left)
+            & (y < rect.bottom)
+            & (y + self.height > rect.top)
         )
+        return np.flatnonzero(mask)
+
+    def remove(self, indices):
+        """Get rid of the bullets with the given indices"""
+        keep = np.ones(self.count, dtype=bool)
+        keep[indices] = False
+        self._keep(keep)
+
+    def empty(self):
+        """Get rid of every bullet"""
+        self.count = 0
+
+    def get_positions(self, indices):
+        """Return the x and y arrays of the top left corners of some bullets"""
+        return self.x[indices], self.y[indices].astype(np.int64)
 
-        self.rect.midtop = ai_game.ship.rect.midtop
+    def get_rects(self):
+        """Return the (x, y, width, height) rect of every bullet"""
+        n = self.count
+        rects = np.empty((n, 4), dtype=np.int64)
+        rects[:, 0] = self.x[:n]
+        rects[:, 1] = self.y[:n]
+        rects[:, 2] = self.width
+        rects[:, 3] = self.height
+        return rects.tolist()
 
-        # Store the bullet's position as a decimal value.
-        self.y = float(self.rect.y)
+    def draw(self, screen):
+        """Draw the bullets to the screen"""
+        draw_rect = pygame.draw.rect
+        color = self.color
+        for rect in self.get_rects():
+            draw_rect(screen, color, rect)
 
-    def update(self):
-        """Move the bullet up the screen."""
+    ################################################################################################
+    # Auxiliary functions
+    ################################################################################################
 
-        # Update the decimal position of the bullet.
-        self.y -= self.settings.bullet_speed
+    def _keep(self, keep):
+        """Compact the arrays, keeping only the bullets where keep is True"""
+        n = int(keep.sum())
+        self.x[:n] = self.x[: self.count][keep]
+        self.y[:n] = self.y[: self.count][keep]
+        self.count = n
 
-        # Update the rect position.
-        self.rect.y = int(self.y)
+    def _grow(self):
+        """Double the capacity of the arrays"""
+        self.capacity *= 2
+        self.x = np.resize(self.x, self.capacity)
+        self.y = np.resize(self.y, self.capacity)
 
-    def draw_bullet(self):
-        """Draw the bullet to the screen."""
-        pygame.draw.rect(self.screen, self.color, self.rect)
+    def __len__(self):
+        """Number of live bullets"""
+        return self.count
@@ -1,4 +1,6 @@
-import pygame.font
+import pygame
+
+from assets import assets
 
 
 class Button:
@@ -16,18 +18,24 @@ class Button:
         b_height=50,
         b_width=260,
         b_color=(255, 175, 0),
+        cache=True,
     ):
 
         # Set the dimensions and properties of the text.
         self.msg = msg
         self.font_filename = f"{main_path}fonts/{font}.ttf"
-        self.t_color = t_color
-        self.font = pygame.font.Font(self.font_filename, t_size)
+        self.t_size = t_size
+        self.t_color = tuple(t_color)
+        self.font = assets.font(self.font_filename, t_size)
+
+        # Share the rendered surfaces with every button that looks the same? Buttons
+        # made once per row of a long list don't, to keep them out of the cache.
+        self.cache = cache
 
         # Set the dimensions and properties of the button.
         self.width = b_width
         self.height = b_height
-        self.b_color = b_color
+        self.b_color = tuple(b_color)
 
         # Set button vertical and horizontal position.
         self.pos_x = pos_x
@@ -39,29 +47,75 @@ class Button:
         # Build the button's rect object.
         self.b_rect = pygame.Rect(0, 0, self.width, self.height)
 
+        # Compose the full button (background + text) into a single shared surface.
+        self.image = self._prep_image()
+
+        # Screen rect used the last time the position was computed.
+        self._placed_on = None
+
     def _prep_msg(self):
         """Turn message into a rendered image and center text on the button"""
-        self.msg_image = self.font.render(self.msg, True, self.t_color, self.b_color)
+        key = (
+            "button_text",
+            self.font_filename,
+            self.t_size,
+            self.msg,
+            self.t_color,
+            self.b_color,
+        )
+        self.msg_image = self._rendered(
+            key, lambda: self.font.render(self.msg, True, self.t_color, self.b_color)
+        )
         self.msg_image_rect = self.msg_image.get_rect()
         if self.width == "auto":
             self.width = self.msg_image_rect.w + 40
         if self.height == "auto":
             self.height = self.msg_image_rect.h + 10
 
+    def _prep_image(self):
+        """Return the cached surface with the button background and its centered text"""
+
+        def render():
+            image = pygame.Surface((self.width, self.height))
+            image.fill(self.b_color)
+            msg_rect = self.msg_image.get_rect(center=image.get_rect().center)
+            image.blit(self.msg_image, msg_rect)
+            return image
+
+        key = (
+            "button",
+            self.font_filename,
+            self.t_size,
+            self.msg,
+            self.t_color,
+            self.b_color,
+            self.width,
+            self.height,
+        )
+        return self._rendered(key, render)
+
+    def _rendered(self, key, render):
+        """Return the surface built by render(), from the shared cache if enabled"""
+        if self.cache:
+            return assets.rendered(key, render)
+        return render()
+
     def draw_button(self, draw_screen):
         """Draw button and message. By default the button is in the center of the screen"""
-        if self.pos_x:
-            self.b_rect.centerx = self.pos_x
-        else:
-            self.b_rect.centerx = draw_screen.get_rect().centerx
-        if self.pos_y:
-            self.b_rect.centery = self.pos_y
-        else:
-            self.b_rect.centery = draw_screen.get_rect().centery
-        self.msg_image_rect.center = self.b_rect.center
-
-        # Draw button.
-        draw_screen.fill(self.b_color, self.b_rect)
-
-        # Draw text.
-        draw_screen.blit(self.msg_image, self.msg_image_rect)
+        screen_rect = draw_screen.get_rect()
+
+        # Only recompute the position if the target surface changed size.
+        if screen_rect != self._placed_on:
+            self._placed_on = screen_rect
+            if self.pos_x:
+                self.b_rect.centerx = self.pos_x
+            else:
+                self.b_rect.centerx = screen_rect.centerx
+            if self.pos_y:
+                self.b_rect.centery = self.pos_y
+            else:
+                self.b_rect.centery = screen_rect.centery
+            self.msg_image_rect.center = self.b_rect.center
+
+        # Draw button and text.
+        draw_screen.blit(self.image, self.b_rect)
@@ -0,0 +1,353 @@
+from bullet import Bullets
+from fleet import Fleet
+from frame_phases import ALIENS, BULLETS, SHIP
+from game_stats import GameStats
+from ship import Ship
+
+# Input commands understood by GameEngine.apply.
+MOVE_LEFT = 0
+STOP_LEFT = 1
+MOVE_RIGHT = 2
+STOP_RIGHT = 3
+FIRE = 4
+START = 5
+PAUSE = 6
+
+
+class GameEngine:
+    """
+    Game rules for Alien Invasion, without any display, sound or real time.
+    It advances from input commands (apply) and fixed time steps (step), and
+    reports what happened in self.events, for a front end to draw and play:
+
+    "start", "pause", "resume": the game state changed by a command.
+    "laser", "fail_shot": a bullet was fired, or there were too many already.
+    "score", "high_score", "level", "ships": a scoring value changed.
+    "ship_hit": the ship was hit, followed by "next_ship" or "game_over".
+    "game_won": the last level was passed.
+    """
+
+    def __init__(self, settings, screen_rect, main_path, ini_diff, high_score=0):
+        """Initialize the game state"""
+
+        # Load game assets and data.
+        self.settings = settings
+        self.screen_rect = screen_rect
+        self.path = main_path
+        self.ini_diff = ini_diff
+
+        # Events produced since the front end last read them.
+        self.events = []
+
+        # Number of steps taken (input traces are stamped with it, see input_trace.py).
+        self.tick = 0
+
+        # FrameTimer to report the time of each part of a step to, if frames are timed.
+        self.timer = None
+
+        # Create an instance to store game statistics.
+        self.stats = GameStats(self, high_score)
+
+        # Create an instance for a ship, the bullets and the fleet of aliens.
+        self.ship = Ship(self)
+        self.bullets = Bullets(self)
+        self.fleet = Fleet(self)
+
+        # Loaded from a saved game? (a saved game keeps its state when started, and
+        # the games after it start from scratch).
+        self.saved_game = False
+
+        # Create the fleet of aliens.
+        self._create_fleet()
+
+    ################################################################################################
+    # Set-up functions
+    ################################################################################################
+
+    def load_state(self, saved_game):
+        """Restore the state of a saved game"""
+        self.saved_game = True
+
+        # Scores.
+        self.stats.ships_left = saved_game["ship_left"]
+        self.stats.score = saved_game["current_score"]
+        self.stats.level = saved_game["level"]
+
+        # Speeds (older saves store them in pixels per frame).
+        if saved_game.get("speed_unit") == "px/s":
+            speed_scale = 1
+        else:
+            speed_scale = self.settings.legacy_speed_scale
+        self.settings.ship_speed = saved_game["ship_speed"] * speed_scale
+        self.settings.bullet_speed = saved_game["bullet_speed"] * speed_scale
+        self.settings.alien_speed = saved_game["alien_speed"] * speed_scale
+        self.settings.alien_points = saved_game["alien_points"]
+        self.settings.fleet_direction = saved_game["fleet_direction"]
+
+        # Screen state.
+        self.ship.x = saved_game["ship_x"]
+        self.ship.rect.x = int(self.ship.x)
+        if "fleet" in saved_game:
+            self.fleet.restore(*saved_game["fleet"])
+        else:
+            # Older saves store the position of every alien.
+            self.fleet.load(saved_game["aliens"])
+
+    def get_state(self):
+        """Get all the data that defines the current state of the game"""
+        state = {
+            # Scores.
+            "high_score": self.stats.high_score,
+            "ship_left": self.stats.ships_left,
+            "current_score": self.stats.score,
+            "level": self.stats.level,
+            # Speeds.
+            "ship_speed": self.settings.ship_speed,
+            "bullet_speed": self.settings.bullet_speed,
+            "alien_speed": self.settings.alien_speed,
+            "speed_unit": "px/s",
+            "alien_points": self.settings.alien_points,
+            "fleet_direction": self.settings.fleet_direction,
+            # Screen state.
+            "ship_x": self.ship.x,
+            # (x, y, occupancy grid) of the formation.
+            "fleet": self.fleet.snapshot(),
+        }
+
+        return state
+
+    def _create_fleet(self):
+        """Create the fleet of aliens"""
+
+        # Find the size of an alien and the height of the ship.
+        alien_width = self.fleet.alien_width
+        alien_height = self.fleet.alien_height
+        ship_height = self.ship.rect.height
+
+        # Determine the number of columns of aliens that fit on the screen,
+        # spacing between each alien is equal to one alien width.
+        available_space_x = self.screen_rect.width - (2 * alien_width)
+        number_columns = available_space_x // (2 * alien_width)
+
+        # Determine the number of rows of aliens that fit on the screen,
+        # spacing between each alien is equal to one alien height.
+        available_space_y = (
+            self.settings.screen_height - (3 * alien_height) - ship_height
+        )
+        number_rows = available_space_y // (2 * alien_height)
+
+        # Create the full fleet of aliens.
+        self.fleet.create(number_rows, number_columns)
+
+    ################################################################################################
+    # Input functions
+    ################################################################################################
+
+    def apply(self, command):
+        """Respond to an input command"""
+
+        # Game actions.
+        if command == MOVE_RIGHT:
+            if self.stats.game_active:
+                self.ship.moving_right = True
+        elif command == MOVE_LEFT:
+            if self.stats.game_active:
+                self.ship.moving_left = True
+        elif command == STOP_RIGHT:
+            self.ship.moving_right = False
+        elif command == STOP_LEFT:
+            self.ship.moving_left = False
+        elif command == FIRE:
+            if self.stats.game_active:
+                self._fire_bullet()
+
+        # Start-stop game.
+        elif command == START:
+            if not self.stats.game_active and not self.stats.game_end:
+                self._start_game()
+        elif command == PAUSE:
+            if self.stats.game_active and not self.stats.game_pause:
+                self.stats.game_pause = True
+                self.events.append("pause")
+            elif self.stats.game_pause:
+                self.stats.game_pause = False
+                self.events.append("resume")
+
+    def _start_game(self):
+        """Starts a new game"""
+        if not self.saved_game:
+
+            # Reset the game statistics.
+            self.stats.reset_stats()
+
+            # Reset the game settings.
+            self.settings.initialize_dynamic_settings(self.ini_diff)
+
+            # Get rid of any remaining bullets.
+            self.bullets.empty()
+
+            # Create a new fleet and center the ship.
+            self._create_fleet()
+            self.ship.center_ship()
+
+        # Starts game.
+        self.saved_game = False
+        self.stats.game_active = True
+        self.events.append("start")
+
+    def stop(self):
+        """Stop the game (on quit or save)"""
+        self.stats.game_active = False
+        self.stats.game_end = False
+
+    ################################################################################################
+    # Game logic and actions functions
+    ################################################################################################
+
+    def step(self, dt):
+        """Advance the game logic dt seconds, if the game is running"""
+        self.tick += 1
+        if not self.stats.game_active or self.stats.game_pause:
+            return
+
+        timer = self.timer
+        self.ship.update(dt)
+        if timer:
+            timer.lap(SHIP)
+        self._update_bullets(dt)
+        if timer:
+            timer.lap(BULLETS)
+        self._update_aliens(dt)
+        if timer:
+            timer.lap(ALIENS)
+
+        if self.stats.level > 50 and self.stats.game_active:
+            # The game is won.
+            self.stats.game_active = False
+            self.stats.game_end = True
+            self.events.append("game_won")
+
+    def _fire_bullet(self):
+        """Create a new bullet if the limit of bullets wasn't reached"""
+        if len(self.bullets) < self.settings.bullets_allowed:
+            self.bullets.fire()
+            self.events.append("laser")
+        else:
+            self.events.append("fail_shot")
+
+    def _update_bullets(self, dt):
+        """Update position of bullets and get rid of old bullets"""
+        # Update bullet positions and get rid of bullets that have disappeared.
+        self.bullets.update(dt)
+
+        self._check_bullet_alien_collisions()
+
+    def _check_bullet_alien_collisions(self):
+        """Respond to bullet-alien collisions"""
+
+        # Remove any bullets and aliens that have collided.
+        # Only the bullets inside the fleet's rect can hit an alien.
+        hit_bullets = []
+        if self.bullets and self.fleet:
+            candidates = self.bullets.overlapping(self.fleet.get_rect())
+            x, y = self.bullets.get_positions(candidates)
+            hits = self.fleet.collide_boxes(
+                x, y, self.bullets.width, self.bullets.height
+            )
+
+            # In bullet order, each bullet kills every alien it overlaps that an
+            # earlier bullet didn't already kill.
+            for box, row, column in hits:
+                if self.fleet.is_alive(row, column):
+                    self.fleet.kill(row, column)
+                    bullet = int(candidates[box])
+                    if not hit_bullets or hit_bullets[-1] != bullet:
+                        hit_bullets.append(bullet)
+                    # Update scores.
+                    self.stats.score += self.settings.alien_points
+
+        if hit_bullets:
+            self.bullets.remove(hit_bullets)
+            self.events.append("score")
+            self._check_high_score()
+
+        # If there are no more aliens start a new level.
+        if not self.fleet:
+            self._start_new_level()
+
+    def _check_high_score(self):
+        """Check to see if there's a new high score"""
+        if self.stats.score > self.stats.high_score:
+            self.stats.high_score = self.stats.score
+            self.events.append("high_score")
+
+    def _start_new_level(self):
+        """Go to next level"""
+
+        # Destroy existing bullets, create new fleet and increase speed.
+        self.bullets.empty()
+        self._create_fleet()
+        self.settings.increase_speed()
+
+        # Increase level.
+        self.stats.level += 1
+        self.events.append("level")
+
+    def _update_aliens(self, dt):
+        """
+        Check if the fleet is at an edge, update the positions of all aliens in the fleet
+        and check for alien collisions.
+        """
+        self._check_fleet_edges()
+        self.fleet.update(dt)
+
+        # Look for alien-ship collisions.
+        if self.fleet.collide(self.ship.rect):
+            self._ship_hit()
+
+        # Look for aliens hitting the bottom of the screen.
+        self._check_aliens_bottom()
+
+    def _check_fleet_edges(self):
+        """Respond appropriately if any aliens have reached an edge"""
+        if self.fleet.check_edges():
+            self._change_fleet_direction()
+
+    def _change_fleet_direction(self):
+        """Drop the entire fleet and change the fleet's direction"""
+        self.fleet.drop()
+        self.settings.fleet_direction *= -1
+
+    def _ship_hit(self):
+        """Respond to the ship being hit by an alien"""
+        self.events.append("ship_hit")
+
+        if self.stats.ships_left > 0:
+            self._next_ship()
+        else:
+            self.stats.game_active = False
+            # Show that the last ship was lost.
+            self.stats.ships_left -= 1
+            self.events.append("ships")
+            self.events.append("game_over")
+
+    def _next_ship(self):
+        """Restart game after losing one ship"""
+
+        # Decrement ships_left.
+        self.stats.ships_left -= 1
+        self.events.append("ships")
+
+        # Get rid of any remaining bullets.
+        self.bullets.empty()
+
+        # Create a new fleet and center the ship.
+        self._create_fleet()
+        self.ship.center_ship()
+        self.events.append("next_ship")
+
+    def _check_aliens_bottom(self):
+        """Check if any aliens have reached the bottom of the screen"""
+        if self.fleet and self.fleet.bottom() >= self.screen_rect.bottom:
+            # Treat this the same as if the ship got hit.
+            self._ship_hit()
@@ -0,0 +1,364 @@
+import numpy as np
+import pygame
+
+from assets import assets
+
+
+class Fleet:
+    """
+    A class to represent the fleet of aliens as a rigid formation.
+
+    The aliens sit on a grid of rows and columns that moves as a whole, so the
+    fleet is stored as an occupancy grid plus a single offset. Live counts per
+    row and per column keep track of the bounding box of the surviving aliens,
+    which makes movement, edge and bottom checks independent of the fleet size.
+    Screen positions are only computed when needed (collisions and drawing).
+
+    The occupancy grid is also the spatial index used for collisions: a uniform
+    grid with one cell per alien, in formation coordinates. Moving the fleet only
+    moves its offset, and a kill clears one cell, so the index is always up to
+    date. A collision query only looks at the cells under the queried rects.
+    """
+
+    def __init__(self, ai_game):
+        """Initialize an empty fleet"""
+
+        # Load game assets and data.
+        self.settings = ai_game.settings
+        self.screen_rect = ai_game.screen_rect
+
+        # Load the alien image and get its size.
+        self.image = assets.image(ai_game.path + "images/alien.bmp")
+        self.alien_width, self.alien_height = self.image.get_size()
+
+        # Distance between the left (top) sides of neighbouring aliens.
+        # Spacing between each alien is equal to one alien width (height).
+        self.step_x = 2 * self.alien_width
+        self.step_y = 2 * self.alien_height
+
+        # Cells to check around a box, for each box size queried.
+        self._cell_offsets = {}
+
+        # Surface with the whole formation drawn on it (see draw), where a kill only
+        # clears the cell of the alien. Transparent pixels use a color that isn't in
+        # the alien image.
+        self.layer = None
+        self.layer_colorkey = (255, 0, 255)
+
+        self.empty()
+
+    ################################################################################################
+    # Set-up functions
+    ################################################################################################
+
+    def empty(self):
+        """Remove every alien"""
+        self.number_rows = 0
+        self.number_columns = 0
+        self.grid = np.zeros((0, 0), dtype=bool)
+        self.row_counts = []
+        self.column_counts = []
+        self.count = 0
+
+        # Horizontal position of the column 0 alien (exact, as a decimal value)
+        # and vertical position of the row 0 alien.
+        self.x = 0.0
+        self.y = 0
+
+        # Bounding box of the live aliens, in rows and columns.
+        self.first_row = self.last_row = 0
+        self.first_column = self.last_column = 0
+
+        # The layout changed, so the fleet layer must be drawn again.
+        self.layer = None
+
+    def create(self, number_rows, number_columns):
+        """Fill a new formation, with the top left alien one alien size away from the corner"""
+        self._build(np.ones((number_rows, number_columns), dtype=bool))
+        self.x = float(self.alien_width)
+        self.y = self.alien_height
+
+    def load(self, saved_fleet):
+        """
+        Rebuild the formation from a list of alien positions ({"x": ..., "y": ...}),
+        as in the "aliens" list of legacy saved games. The positions must lie on the
+        formation grid
+        """
+        self.empty()
+        if not saved_fleet:
+            return
+
+        x = np.array([item["x"] for item in saved_fleet])
+        y = np.array([item["y"] for item in saved_fleet])
+        min_x = x.min()
+        min_y = y.min()
+
+        # Place the leftmost and the topmost aliens on column 0 and row 0.
+        rows = np.rint((y - min_y) / self.step_y).astype(np.int64)
+        columns = np.rint((x - min_x) / self.step_x).astype(np.int64)
+        grid = np.zeros((rows.max() + 1, columns.max() + 1), dtype=bool)
+        grid[rows, columns] = True
+        self._build(grid)
+        self.x = float(min_x)
+        self.y = int(min_y)
+
+    def snapshot(self):
+        """
+        Return the whole formation as (x, y, grid), where x and y are the position of
+        the row 0, column 0 alien and grid is a copy of the occupancy grid
+        """
+        return self.x, self.y, self.grid.copy()
+
+    def restore(self, x, y, grid):
+        """Rebuild the formation from a snapshot (see snapshot)"""
+        self._build(np.array(grid, dtype=bool))
+        self.x = float(x)
+        self.y = int(y)
+
+    def _build(self, grid):
+        """Set up the formation from an occupancy grid"""
+        self.number_rows, self.number_columns = grid.shape
+        self.grid = grid
+        self.layer = None
+        self.row_counts = grid.sum(axis=1).tolist()
+        self.column_counts = grid.sum(axis=0).tolist()
+        self.count = int(grid.sum())
+
+        if self.count:
+            live_rows = np.flatnonzero(self.row_counts)
+            live_columns = np.flatnonzero(self.column_counts)
+            self.first_row, self.last_row = int(live_rows[0]), int(live_rows[-1])
+            self.first_column = int(live_columns[0])
+            self.last_column = int(live_columns[-1])
+
+    ################################################################################################
+    # Movement functions
+    ################################################################################################
+
+    def update(self, dt):
+        """Move the fleet dt seconds ahead"""
+        self.x += self.settings.alien_speed * self.settings.fleet_direction * dt
+
+    def drop(self):
+        """Move the fleet down"""
+        self.y += self.settings.fleet_drop_speed
+
+    def check_edges(self):
+        """Return True if the fleet is at an edge of the screen"""
+        if not self.count:
+            return False
+        left = self._alien_x(self.first_column)
+        right = self._alien_x(self.last_column) + self.alien_width
+        return right >= self.screen_rect.right or left <= 0
+
+    def bottom(self):
+        """Return the bottom of the lowest live alien"""
+        return self._alien_y(self.last_row) + self.alien_height
+
+    ################################################################################################
+    # Collision functions
+    ################################################################################################
+
+    def collide(self, rect):
+        """Return the (row, column) cells of the live aliens that overlap rect"""
+        if not self.count:
+            return []
+
+        # Quick rejection of rects above or below the fleet (e.g. the ship, most of the time).
+        if rect.bottom <= self._alien_y(self.first_row) or rect.top >= self.bottom():
+            return []
+
+        hits = self.collide_boxes(
+            np.array([rect.x]), np.array([rect.y]), rect.width, rect.height
+        )
+        return [(row, column) for _, row, column in hits]
+
+    def collide_boxes(self, x, y, width, height):
+        """
+        Find the live aliens that overlap a set of boxes of the same size, whose top
+        left corners are given by the integer arrays x and y. Returns a list of
+        (box index, row, column), sorted by box index
+        """
+        n = len(x)
+        if not self.count or not n:
+            return []
+
+        # Grid cells that may overlap each box, from the cell left of (above) its top
+        # left corner, since aliens only fill part of their cell, to its bottom right corner.
+        offsets_y, offsets_x = self._get_cell_offsets(width, height)
+        first_columns = np.floor((x - self.x) / self.step_x).astype(np.int64) - 1
+        first_rows = (y - self.y) // self.step_y - 1
+
+        # All (box, row, column) candidates, as flat arrays.
+        boxes = np.repeat(np.arange(n), len(offsets_x))
+        columns = (first_columns[:, None] + offsets_x).ravel()
+        rows = (first_rows[:, None] + offsets_y).ravel()
+
+        # Keep the candidates inside the bounding box of the live aliens...
+        inside = (
+            (columns >= self.first_column)
+            & (columns <= self.last_column)
+            & (rows >= self.first_row)
+            & (rows <= self.last_row)
+        )
+        boxes, rows, columns = boxes[inside], rows[inside], columns[inside]
+
+        # ...then the ones with a live alien...
+        live = self.grid[rows, columns]
+        boxes, rows, columns = boxes[live], rows[live], columns[live]
+
+        # ...and finally the ones whose rects really overlap (same test as Rect.colliderect).
+        alien_x = np.trunc(self.x + self.step_x * columns).astype(np.int64)
+        alien_y = self.y + self.step_y * rows
+        box_x = x[boxes]
+        box_y = y[boxes]
+        overlap = (
+            (alien_x < box_x + width)
+            & (alien_x + self.alien_width > box_x)
+            & (alien_y < box_y + height)
+            & (alien_y + self.alien_height > box_y)
+        )
+
+        return list(
+            zip(
+                boxes[overlap].tolist(),
+                rows[overlap].tolist(),
+                columns[overlap].tolist(),
+            )
+        )
+
+    def _get_cell_offsets(self, width, height):
+        """Return the (row, column) offsets of the grid cells a box of a given size may overlap"""
+        key = (width, height)
+        offsets = self._cell_offsets.get(key)
+        if offsets is None:
+            span_x = width // self.step_x + 3
+            span_y = height // self.step_y + 3
+            offsets = self._cell_offsets[key] = np.divmod(
+                np.arange(span_x * span_y), span_x
+            )
+        return offsets
+
+    def is_alive(self, row, column):
+        """Return True if the alien in a cell is alive"""
+        return bool(self.grid[row, column])
+
+    def kill(self, row, column):
+        """Remove the alien in a cell, and shrink the bounding box if needed"""
+        self.grid[row, column] = False
+        if self.layer is not None:
+            self.layer.fill(
+                self.layer_colorkey,
+                (
+                    column * self.step_x,
+                    row * self.step_y,
+                    self.alien_width,
+                    self.alien_height,
+                ),
+            )
+        self.row_counts[row] -= 1
+        self.column_counts[column] -= 1
+        self.count -= 1
+
+        if not self.count:
+            return
+
+        while not self.row_counts[self.first_row]:
+            self.first_row += 1
+        while not self.row_counts[self.last_row]:
+            self.last_row -= 1
+        while not self.column_counts[self.first_column]:
+            self.first_column += 1
+        while not self.column_counts[self.last_column]:
+            self.last_column -= 1
+
+    ################################################################################################
+    # Positions and drawing functions
+    ################################################################################################
+
+    def alien_rect(self, row, column):
+        """Return the screen rect of the alien in a cell"""
+        return pygame.Rect(
+            self._alien_x(column),
+            self._alien_y(row),
+            self.alien_width,
+            self.alien_height,
+        )
+
+    def cells(self):
+        """Return the (row, column) cells of the live aliens"""
+        if not self.count:
+            return []
+        live = np.argwhere(
+            self.grid[
+                self.first_row : self.last_row + 1,
+                self.first_column : self.last_column + 1,
+            ]
+        )
+        live += (self.first_row, self.first_column)
+        return live.tolist()
+
+    def get_rect(self):
+        """Return the screen rect around the live aliens"""
+        top_left = self.alien_rect(self.first_row, self.first_column)
+        bottom_right = self.alien_rect(self.last_row, self.last_column)
+        return top_left.union(bottom_right)
+
+    def draw(self, screen):
+        """Draw the live aliens"""
+        if not self.count:
+            return
+
+        if self.settings.cache_fleet_layer:
+            # One blit of the bounding box of the live aliens, from the pre-rendered
+            # layer, at the position of the fleet.
+            if self.layer is None:
+                self.layer = self._render_layer()
+            top_left = self.alien_rect(self.first_row, self.first_column)
+            area = pygame.Rect(
+                self.first_column * self.step_x,
+                self.first_row * self.step_y,
+                (self.last_column - self.first_column) * self.step_x + self.alien_width,
+                (self.last_row - self.first_row) * self.step_y + self.alien_height,
+            )
+            screen.blit(self.layer, top_left, area)
+        else:
+            image = self.image
+            screen.blits(
+                [(image, self.alien_rect(row, column)) for row, column in self.cells()],
+                False,
+            )
+
+    def _render_layer(self):
+        """Draw the live aliens on a transparent surface the size of the formation"""
+        width = (self.number_columns - 1) * self.step_x + self.alien_width
+        height = (self.number_rows - 1) * self.step_y + self.alien_height
+        layer = pygame.Surface((width, height))
+        if assets.has_display():
+            layer = layer.convert()
+        layer.fill(self.layer_colorkey)
+
+        image = self.image
+        layer.blits(
+            [
+                (image, (column * self.step_x, row * self.step_y))
+                for row, column in self.cells()
+            ],
+            False,
+        )
+        # No RLE acceleration, since kills change the layer all the time.
+        layer.set_colorkey(self.layer_colorkey)
+
+        return layer
+
+    def _alien_x(self, column):
+        """Return the left side of the aliens in a column"""
+        return int(self.x + self.step_x * column)
+
+    def _alien_y(self, row):
+        """Return the top side of the aliens in a row"""
+        return self.y + self.step_y * row
+
+    def __len__(self):
+        """Number of live aliens"""
+        return self.count
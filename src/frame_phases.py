@@ -0,0 +1,21 @@
+# Phases of a frame, in the order they run. Each one is the time since the last phase
+# that ended, so together they add up to the whole frame.
+EVENTS = 0  # AlienInvasion._check_events
+WAIT = 1  # Waiting for the frame cap (clock.tick)
+SHIP = 2  # Ship.update
+BULLETS = 3  # GameEngine._update_bullets (with the collisions)
+ALIENS = 4  # GameEngine._update_aliens
+LOGIC = 5  # Engine events (sounds, scoreboard) and delayed actions
+DRAW = 6  # AlienInvasion._draw_frame
+PRESENT = 7  # display.update or display.flip
+
+PHASE_NAMES = [
+    "events",
+    "wait",
+    "ship",
+    "bullets",
+    "aliens",
+    "logic",
+    "draw",
+    "present",
+]
@@ -0,0 +1,136 @@
+import csv
+import os
+import time
+from pathlib import Path
+
+import numpy as np
+import pygame
+
+from assets import assets
+from frame_phases import PHASE_NAMES
+
+
+class FrameTimer:
+    """
+    A class to time each phase of the frames of the game loop. The last frames are
+    kept in a ring buffer (one row per frame, one column per phase), shown as FPS and
+    p50/p99 per phase in an overlay, and written to a CSV file when the game ends.
+    The game loop only calls it when timing is on, so it costs nothing when off
+    """
+
+    def __init__(self, main_path, frames=3600, refresh_time=0.5):
+        """Initialize an empty ring buffer of the given number of frames"""
+
+        # Ring buffer of phase times (in seconds), the row of the current frame, and
+        # the number of frames recorded so far.
+        self.times = np.zeros((frames, len(PHASE_NAMES)))
+        self.row = 0
+        self.frames = 0
+
+        # Times of the current frame, added to the buffer when it ends.
+        self.current = [0.0] * len(PHASE_NAMES)
+        self.last_lap = time.perf_counter()
+
+        # Overlay, drawn again from the buffer every refresh_time seconds.
+        self.show_overlay = True
+        self.refresh_time = refresh_time
+        self.last_refresh = 0.0
+        self.font = assets.font(main_path + "fonts/bpmono.ttf", 14)
+        self.overlay = None
+        self.overlay_rect = pygame.Rect(0, 0, 0, 0)
+
+    def lap(self, phase):
+        """Add the time since the last lap to a phase of the current frame"""
+        now = time.perf_counter()
+        self.current[phase] += now - self.last_lap
+        self.last_lap = now
+
+    def end_frame(self):
+        """Store the current frame in the ring buffer and start the next one"""
+        self.times[self.row] = self.current
+        self.row = (self.row + 1) % len(self.times)
+        self.frames += 1
+        self.restart_frame()
+
+    def restart_frame(self):
+        """Forget the current frame (e.g. the loop was idle) and start it again"""
+        self.current = [0.0] * len(PHASE_NAMES)
+        self.last_lap = time.perf_counter()
+
+    def get_frames(self):
+        """Return the recorded frames, oldest first"""
+        if self.frames < len(self.times):
+            return self.times[: self.frames]
+        return np.roll(self.times, -self.row, axis=0)
+
+    ################################################################################################
+    # Overlay
+    ################################################################################################
+
+    def draw_overlay(self, screen, topleft):
+        """Draw the overlay, updating it first if it is older than refresh_time"""
+        now = time.perf_counter()
+        if self.overlay is None or now - self.last_refresh >= self.refresh_time:
+            self.overlay = self._render_overlay()
+            self.last_refresh = now
+
+        self.overlay_rect = self.overlay.get_rect(topleft=topleft)
+        screen.blit(self.overlay, self.overlay_rect)
+
+    def _render_overlay(self):
+        """
+        Returns the surface with the FPS, the p50 and p99 of every phase, and the
+        memory taken by the decoded sounds
+        """
+        frames = self.get_frames()
+        if len(frames):
+            totals = frames.sum(axis=1)
+            p50, p99 = np.percentile(frames, [50, 99], axis=0) * 1000
+            total_p50, total_p99 = np.percentile(totals, [50, 99]) * 1000
+            fps = 1 / totals.mean() if totals.mean() else 0
+        else:
+            p50 = p99 = [0.0] * len(PHASE_NAMES)
+            total_p50 = total_p99 = fps = 0
+
+        lines = [f"FPS {fps:6.1f}   p50 ms  p99 ms"]
+        for i, name in enumerate(PHASE_NAMES):
+            lines.append(f"{name:<10}{p50[i]:>9.2f}{p99[i]:>8.2f}")
+        lines.append(f"{'frame':<10}{total_p50:>9.2f}{total_p99:>8.2f}")
+        lines.append(f"{'sounds':<10}{assets.sound_memory() / 1024:>9.0f} KB")
+
+        line_height = self.font.get_linesize()
+        images = [
+            self.font.render(line, True, (30, 30, 30), (245, 245, 245))
+            for line in lines
+        ]
+        width = max(image.get_width() for image in images)
+        overlay = pygame.Surface((width + 8, line_height * len(images) + 8))
+        overlay.fill((245, 245, 245))
+        for i, image in enumerate(images):
+            overlay.blit(image, (4, 4 + i * line_height))
+
+        return overlay
+
+    ################################################################################################
+    # Export
+    ################################################################################################
+
+    def write_csv(self, filename):
+        """Write the recorded frames to a CSV file, one row per frame, times in ms"""
+        Path(os.path.dirname(filename) or ".").mkdir(parents=True, exist_ok=True)
+        frames = self.get_frames() * 1000
+
+        # Number of the oldest frame still in the buffer.
+        first = self.frames - len(frames)
+
+        with open(filename, "w", newline="") as f:
+            writer = csv.writer(f)
+            writer.writerow(
+                ["frame"] + [f"{name}_ms" for name in PHASE_NAMES] + ["total_ms"]
+            )
+            for i, row in enumerate(frames.tolist()):
+                writer.writerow(
+                    [first + i]
+                    + [f"{value:.4f}" for value in row]
+                    + [f"{sum(row):.4f}"]
+                )
@@ -0,0 +1,130 @@
+import sys
+import time
+from collections import deque
+
+# Quality levels, from full quality down. Each level keeps the savings of the ones
+# above it, and they are ordered from the least to the most noticeable. There is no
+# lower render resolution level: scaling a smaller frame up to the scene costs about
+# as much as drawing the whole frame (22 ms at 8K), and every frame would have to be
+# presented whole, instead of only its dirty rects.
+FULL = 0
+QUIET = 1  # Non-essential sounds (laser, misfire) are skipped.
+FLEET_LAYER = 2  # The fleet is drawn from its cached layer.
+SLOW_HUD = 3  # The score, high score and rank are redrawn a few times per second.
+HALF_RATE = 4  # Only every other frame is drawn (the game logic runs as always).
+
+LEVEL_NAMES = ["full", "quiet", "fleet layer", "slow HUD", "half rate"]
+
+
+class PerformanceGovernor:
+    """
+    A class to keep the frame pacing steady by trading quality for time. It watches
+    the work time of the frames (without the wait for the frame cap) against a
+    budget: when the p90 of the last frames is over budget the quality goes one level
+    down, and when it is under headroom * budget it goes one level up. After a change
+    it waits cooldown seconds before the next one, and a level that had to be left
+    right after going up to it (within two windows of frames) is retried less and
+    less often. Levels that would change nothing with the current settings can be
+    skipped
+    """
+
+    def __init__(
+        self,
+        budget,
+        headroom=0.7,
+        cooldown=2.0,
+        window=30,
+        enabled=True,
+        skip_levels=(),
+    ):
+        """Initialize the governor at full quality"""
+
+        # Work time (in seconds) allowed per frame, and fraction of it below which
+        # there is room for a better quality.
+        self.budget = budget
+        self.headroom = headroom
+
+        # Does the governor change the quality?
+        self.enabled = enabled
+        self.level = FULL
+
+        # Levels the governor can go to, from full quality down.
+        self.levels = [
+            level for level in range(len(LEVEL_NAMES)) if level not in skip_levels
+        ]
+
+        # Work time of the last frames.
+        self.work_times = deque(maxlen=window)
+
+        # Seconds to wait after a change, and before going up again (this one
+        # doubles each time going up had to be undone).
+        self.cooldown = cooldown
+        self.up_cooldown = cooldown
+        self.last_change = time.perf_counter()
+        self.last_change_up = False
+        self.frames_since_change = 0
+
+        # Every change: [(seconds since start, old level, new level, p90 work time)].
+        self.start = self.last_change
+        self.transitions = []
+
+    def update(self, work_time):
+        """
+        Add the work time (in seconds) of a frame, and change the quality level if
+        needed. Return True if it changed
+        """
+        if not self.enabled:
+            return False
+
+        self.work_times.append(work_time)
+        self.frames_since_change += 1
+        window = self.work_times.maxlen
+        if len(self.work_times) < window:
+            return False
+
+        now = time.perf_counter()
+        since_change = now - self.last_change
+        load = sorted(self.work_times)[int(0.9 * len(self.work_times))]
+
+        index = self.levels.index(self.level)
+        if load > self.budget and index < len(self.levels) - 1:
+            if since_change < self.cooldown:
+                return False
+            if self.last_change_up and self.frames_since_change <= 2 * window:
+                # The better quality didn't hold, so wait longer to try it again.
+                self.up_cooldown = min(self.up_cooldown * 2, 64 * self.cooldown)
+            self._set_level(self.levels[index + 1], load, now)
+            self.last_change_up = False
+            return True
+
+        if load < self.headroom * self.budget and index > 0:
+            if since_change < self.up_cooldown:
+                return False
+            self._set_level(self.levels[index - 1], load, now)
+            self.last_change_up = True
+            return True
+
+        if self.last_change_up and self.frames_since_change > 4 * window:
+            # The better quality held, going up is cheap again.
+            self.up_cooldown = self.cooldown
+            self.last_change_up = False
+
+        return False
+
+    def restart_window(self):
+        """Forget the last frames (e.g. after the game loop was idle)"""
+        self.work_times.clear()
+
+    def _set_level(self, level, load, now):
+        """Change the quality level, and log the change"""
+        self.transitions.append((now - self.start, self.level, level, load))
+        print(
+            f"Quality {LEVEL_NAMES[self.level]} -> {LEVEL_NAMES[level]} "
+            f"at {now - self.start:.1f} s: p90 frame work {load * 1000:.1f} ms, "
+            f"budget {self.budget * 1000:.1f} ms",
+            file=sys.stderr,
+        )
+        self.level = level
+        self.last_change = now
+        self.frames_since_change = 0
+        self.work_times.clear()
@@ -0,0 +1,29 @@
+import pygame
+
+# Window events after which the screen contents must be drawn again.
+REDRAW_EVENTS = {
+    pygame.VIDEOEXPOSE,
+    pygame.WINDOWEXPOSED,
+    pygame.WINDOWSHOWN,
+    pygame.WINDOWRESTORED,
+    pygame.WINDOWFOCUSGAINED,
+    pygame.WINDOWSIZECHANGED,
+}
+
+# Window events that mean the player is not looking at the game.
+FOCUS_LOST_EVENTS = {pygame.WINDOWFOCUSLOST, pygame.WINDOWMINIMIZED}
+
+# Window events that mean the player is back.
+FOCUS_GAINED_EVENTS = {pygame.WINDOWFOCUSGAINED, pygame.WINDOWRESTORED}
+
+
+def wait_events(timeout=250):
+    """
+    Sleep until there is at least one event or timeout milliseconds pass,
+    then return every pending event (empty list on timeout)
+    """
+    event = pygame.event.wait(timeout)
+    if event.type == pygame.NOEVENT:
+        return []
+
+    return [event] + pygame.event.get()
@@ -1,8 +1,9 @@
-import json
 import sys
 
 from menu import Menu
 from ranking import *
+from save_store import get_save_store
+from score_store import get_score_store
 from user_input import InputBox
 
 ####################################################################################################
@@ -131,14 +132,14 @@ def _select_difficulty(main_path):
     menu = Menu(main_path, ["Easy", "Medium", "Hard"], "Choose difficulty")
     diff = menu.run_menu()
 
-    # Setting for different difficulties:
+    # Setting for different difficulties, in pixels per second:
     # (Initial alien speed, Initial bullet speed, Initial ship speed).
     if diff == "Hard":
-        return (2, 4, 2.5)
+        return (240, 480, 300)
     elif diff == "Medium":
-        return (1.5, 3.5, 2)
+        return (180, 420, 240)
     elif diff == "Easy":
-        return (1, 3, 1.5)
+        return (120, 360, 180)
     else:
         # Go back.
         return diff
@@ -148,14 +149,7 @@ def _select_user(main_path):
     """Menu for the selection of type of user"""
 
     # Get list of saved users.
-    old_user_filename = main_path + "user_data/high_scores.json"
-    try:
-        with open(old_user_filename) as f:
-            # List of old user.
-            old_users = list(json.load(f).keys())
-    except FileNotFoundError:
-        # The list of old users is empty.
-        old_users = []
+    old_users = get_score_store(main_path).users()
 
     # User selection menu.
     if old_users:
@@ -194,25 +188,17 @@ def _select_user(main_path):
 
 def _show_ranking(main_path):
     """Show the stored users in a ranking by their scores"""
-    high_scores_filename = main_path + "user_data/high_scores.json"
 
-    try:
-        with open(high_scores_filename) as f:
-            # Stored users and their scores.
-            high_scores = json.load(f)
-    except FileNotFoundError:
-        high_scores = None
+    # Stored users and their scores, kept sorted in memory.
+    ranking_index = get_score_store(main_path).ranking()
 
-    if high_scores:
-        # Sort and complete data.
-        scores = sort_scores(high_scores)
-        scores = set_date_and_idx(scores)
+    if ranking_index:
+        # Complete data, and add title row.
+        title_row = ["#", "User:", "High score:", "Lives left:", "Date:"]
+        scores = [title_row] + ranking_index.get_rows()
 
-        # Add title row.
-        scores.insert(0, ["#", "User:", "High score:", "Lives left:", "Date:"])
-
-        # Construct nice row string.
-        max_len = get_max_len(scores, [0, 1, 2, 3, 4])
+        # Construct nice row string (the index knows the column widths).
+        max_len = ranking_index.get_max_len(title_row)
         rows = []
         for item in scores:
             rows.append(get_str_for_ranking(item, max_len))
@@ -224,7 +210,9 @@ def _show_ranking(main_path):
             {"b_color": (230, 230, 230), "t_size": 25, "b_width": "auto"},
         )
         rows = {**first_row, **ranking}
-        menu = Menu(main_path, rows, "Ranking", click=False)
+
+        # Scrollable list, with the title row always on top.
+        menu = Menu(main_path, rows, "Ranking", click=False, scroll=True, pinned_rows=1)
     else:
         menu = Menu(
             main_path,
@@ -238,18 +226,14 @@ def _show_ranking(main_path):
 
 def _select_saved_games(main_path):
     """Displays saved games and allows to choose one to load up"""
-    saved_games_filename = main_path + "user_data/saved_games.json"
 
-    try:
-        with open(saved_games_filename) as f:
-            saved_games = json.load(f)
-    except FileNotFoundError:
-        saved_games = None
+    # Only the manifest is read, each game is loaded once chosen.
+    saved_games = get_save_store(main_path).manifest()
 
     if saved_games:
         rows = _get_saved_games_str(saved_games)
         users = dict.fromkeys(rows, {"b_width": "auto"})
-        menu = Menu(main_path, users, "Saved games")
+        menu = Menu(main_path, users, "Saved games", scroll=True)
     else:
         menu = Menu(
             main_path,
@@ -302,16 +286,10 @@ def _get_saved_game_key(saved_game):
 
 def _game_data(main_path, key):
     """Get a saved game instance"""
+    game = get_save_store(main_path).load(key)
 
-    saved_games_filename = main_path + "user_data/saved_games.json"
-
-    # If this function is executed, the file exist.
-    with open(saved_games_filename) as f:
-        saved_games = json.load(f)
-        game = saved_games[key]
-
-        # (Username, Initial difficulty, Screen size, Rest of game state)
-        return (game["user"], game["ini_diff"], game["screen_size"], game)
+    # (Username, Initial difficulty, Screen size, Rest of game state)
+    return (game["user"], game["ini_diff"], game["screen_size"], game)
 
 
 def _get_old_user(main_path, old_users):
@@ -320,7 +298,7 @@ def _get_old_user(main_path, old_users):
     buttons = old_users
 
     # Create and show old users menu.
-    old_user_menu = Menu(main_path, buttons, "Old users")
+    old_user_menu = Menu(main_path, buttons, "Old users", scroll=True)
     user_selected = old_user_menu.run_menu()
 
     return user_selected
@@ -334,23 +312,7 @@ def _get_new_user(main_path, old_users):
     if new_user == "Back":
         return "Back"
 
-    # Construct high_scores list element for the new user.
-    old_user_filename = main_path + "user_data/high_scores.json"
-    new_user_dict = {
-        "high_score": 0,
-        "lives_left": None,
-        "max_level": 1,
-        "date": None,
-    }
-
     # Add new user to high score list.
-    try:
-        with open(old_user_filename) as f:
-            user_list = json.load(f)
-            user_list[new_user] = new_user_dict
-    except FileNotFoundError:
-        user_list = {new_user: new_user_dict}
-    finally:
-        with open(old_user_filename, "w") as f:
-            json.dump(user_list, f)
+    get_score_store(main_path).add_user(new_user)
+
     return new_user
@@ -0,0 +1,249 @@
+import hashlib
+import os
+import struct
+from pathlib import Path
+
+import pygame
+
+from engine import GameEngine
+from settings import Settings
+from snapshot import dump_snapshot, load_snapshot
+
+####################################################################################################
+# Input traces
+####################################################################################################
+
+# An input trace is every command sent to the GameEngine during a game, stamped with
+# the engine tick (number of steps taken) it was sent at, plus what is needed to build
+# the same engine again. The game logic only depends on the commands and the fixed
+# steps between them, so replaying a trace reproduces the game exactly, no matter how
+# fast it is replayed.
+#
+# Layout (little endian):
+#
+#   header   magic "AITR", version (B), flags (B)
+#   config   initial difficulty (3 doubles), screen width and height, high score
+#   state    if FLAG_SAVED_GAME: length (I) and binary snapshot of the saved game
+#   inputs   one varint per command: (ticks since the previous command << 3) | command
+#            The END command stamps the last tick of the game. A trace without it
+#            (e.g. the game didn't exit normally) ends at its last command.
+
+MAGIC = b"AITR"
+VERSION = 1
+
+# Header flags.
+FLAG_FULL_SCREEN = 1
+FLAG_SAVED_GAME = 2
+
+# Command after the engine commands (0 to 6), marking the end of the trace.
+END = 7
+
+_HEADER = struct.Struct("<4sBB")
+_CONFIG = struct.Struct("<dddHHq")
+_STATE_LENGTH = struct.Struct("<I")
+
+# Game flags, number of bullets and tick, hashed with the state for the checksum.
+_CHECKSUM_EXTRA = struct.Struct("<???Iq")
+
+
+class Trace:
+    """An input trace, as recorded by TraceRecorder"""
+
+    def __init__(self, ini_diff, screen_size, screen_dims, high_score, saved_game):
+        """Initialize the trace of a game, without commands"""
+
+        # Configuration of the game.
+        self.ini_diff = ini_diff
+        self.screen_size = screen_size
+        self.screen_dims = screen_dims
+        self.high_score = high_score
+
+        # State of the saved game the game started from, or None for a new game.
+        self.saved_game = saved_game
+
+        # [(tick, command)], and the last tick of the game.
+        self.commands = []
+        self.end_tick = 0
+
+
+class TraceRecorder:
+    """
+    A class to write the input trace of a game to a file, as it is played.
+    Each command is appended as it is sent (usually one or two bytes)
+    """
+
+    def __init__(self, filename, engine, screen_size, saved_game=None):
+        """Start the trace of a game, writing its configuration"""
+        Path(os.path.dirname(filename) or ".").mkdir(parents=True, exist_ok=True)
+        self.file = open(filename, "wb")
+
+        flags = 0
+        if screen_size == "Full Screen":
+            flags |= FLAG_FULL_SCREEN
+        if saved_game:
+            flags |= FLAG_SAVED_GAME
+
+        self.file.write(_HEADER.pack(MAGIC, VERSION, flags))
+        self.file.write(
+            _CONFIG.pack(
+                *engine.ini_diff,
+                engine.screen_rect.width,
+                engine.screen_rect.height,
+                engine.stats.high_score,
+            )
+        )
+        if saved_game:
+            state = dump_snapshot(saved_game)
+            self.file.write(_STATE_LENGTH.pack(len(state)) + state)
+
+        # Tick of the last command.
+        self.last_tick = 0
+
+    def record(self, tick, command):
+        """Append a command sent to the engine at the given tick"""
+        self.file.write(_pack_varint((tick - self.last_tick) << 3 | command))
+        self.last_tick = tick
+
+    def close(self, tick):
+        """Mark the last tick of the game and close the file"""
+        if not self.file.closed:
+            self.record(tick, END)
+            self.file.close()
+
+
+def load_trace(data):
+    """Return the Trace stored in the bytes of a trace file"""
+    magic, version, flags = _HEADER.unpack_from(data)
+    if magic != MAGIC:
+        raise ValueError("Not an input trace")
+    if version != VERSION:
+        raise ValueError(f"Unsupported input trace version: {version}")
+    offset = _HEADER.size
+
+    *ini_diff, width, height, high_score = _CONFIG.unpack_from(data, offset)
+    offset += _CONFIG.size
+
+    saved_game = None
+    if flags & FLAG_SAVED_GAME:
+        (length,) = _STATE_LENGTH.unpack_from(data, offset)
+        offset += _STATE_LENGTH.size
+        saved_game = load_snapshot(data[offset : offset + length])
+        offset += length
+
+    trace = Trace(
+        ini_diff,
+        "Full Screen" if flags & FLAG_FULL_SCREEN else "Small Screen",
+        (width, height),
+        high_score,
+        saved_game,
+    )
+
+    tick = 0
+    while offset < len(data):
+        value, offset = _unpack_varint(data, offset)
+        tick += value >> 3
+        command = value & 7
+        if command == END:
+            break
+        trace.commands.append((tick, command))
+    trace.end_tick = tick
+
+    return trace
+
+
+####################################################################################################
+# Replay
+####################################################################################################
+
+
+def make_engine(trace, main_path):
+    """Return a GameEngine in the same state as the one the trace was recorded from"""
+    ini_diff = tuple(trace.ini_diff)
+    engine = GameEngine(
+        Settings(ini_diff),
+        pygame.Rect((0, 0), trace.screen_dims),
+        main_path,
+        ini_diff,
+        trace.high_score,
+    )
+    if trace.saved_game:
+        engine.load_state(trace.saved_game)
+
+    return engine
+
+
+def replay(trace, engine, apply=None, on_step=None):
+    """
+    Feed the commands of a trace to an engine (built by make_engine) as fast as
+    possible, stepping it between them, and return the checksum of its final state.
+    apply(command) sends a command (engine.apply by default), and on_step() is called
+    after every step (by default it drops the engine events)
+    """
+    if apply is None:
+        apply = engine.apply
+    if on_step is None:
+        on_step = engine.events.clear
+    tick_time = engine.settings.tick_time
+
+    for tick, command in trace.commands:
+        while engine.tick < tick:
+            engine.step(tick_time)
+            on_step()
+        apply(command)
+        engine.events.clear()
+
+    while engine.tick < trace.end_tick:
+        engine.step(tick_time)
+        on_step()
+
+    return state_checksum(engine)
+
+
+def state_checksum(engine):
+    """
+    Return a short hash of the state of an engine: scores, speeds, ship, fleet,
+    bullets, game flags and tick. Two engines with the same checksum are in the same
+    state, to the last bit of every position
+    """
+    state = engine.get_state()
+    state.update(user="", ini_diff=engine.ini_diff, screen_size="", date=0.0)
+
+    stats = engine.stats
+    n = len(engine.bullets)
+    digest = hashlib.sha256(dump_snapshot(state, compress=False))
+    digest.update(
+        _CHECKSUM_EXTRA.pack(
+            stats.game_active, stats.game_pause, stats.game_end, n, engine.tick
+        )
+    )
+    digest.update(engine.bullets.x[:n].tobytes())
+    digest.update(engine.bullets.y[:n].tobytes())
+
+    return digest.hexdigest()[:16]
+
+
+####################################################################################################
+# Auxiliary functions
+####################################################################################################
+
+
+def _pack_varint(value):
+    """Returns a non negative integer in 7 bit groups, lowest first"""
+    data = bytearray()
+    while value > 0x7F:
+        data.append(value & 0x7F | 0x80)
+        value >>= 7
+    data.append(value)
+    return bytes(data)
+
+
+def _unpack_varint(data, offset):
+    """Returns the integer packed at offset, and the offset after it"""
+    value = shift = 0
+    while True:
+        byte = data[offset]
+        offset += 1
+        value |= (byte & 0x7F) << shift
+        if byte < 0x80:
+            return value, offset
+        shift += 7
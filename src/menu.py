@@ -1,18 +1,37 @@
 import sys
 
 import pygame
-from pygame.mixer import Sound
 
+from assets import assets
 from button import Button
+from idle import REDRAW_EVENTS, wait_events
+from startup import startup
+from window import window
 
 
 class Menu:
-    """Overall class for a selection menu"""
+    """
+    Overall class for a selection menu. In list mode (scroll=True) the options are
+    rows of a list shown page_rows at a time, in a window of fixed size. Only the
+    visible rows have buttons, and the list scrolls with the keyboard (arrows,
+    Page Up/Down, Home/End), the mouse wheel, or by typing a row number and Enter.
+    The first pinned_rows options (e.g. a header) are always shown above the list
+    """
 
-    def __init__(self, main_path, options, caption, back=True, click=True):
+    def __init__(
+        self,
+        main_path,
+        options,
+        caption,
+        back=True,
+        click=True,
+        scroll=False,
+        page_rows=10,
+        pinned_rows=0,
+    ):
         """Initialize the game, and create game resources"""
 
-        pygame.init()
+        window.init()
 
         # Back button?
         self.back = back
@@ -30,18 +49,36 @@ class Menu:
         else:
             self.custom = False
         self.texts = list(self.options.keys()) if self.custom else self.options
-        self.click_sound = Sound(self.path + "sounds/click.wav")
+        self.click_sound = assets.sound(self.path + "sounds/click.wav")
+
+        # List mode: pinned options and the rows of the list, and the list position.
+        self.scroll = scroll
+        if self.scroll:
+            self.pinned = self.texts[:pinned_rows]
+            self.rows = self.texts[pinned_rows:]
+            self.page_rows = min(page_rows, len(self.rows))
+            self.first_row = 0
+            # Row number being typed to jump to it.
+            self.jump_text = ""
+            self.footer_font = assets.font(self.path + "fonts/bpmono.ttf", 20)
+            n_slots = len(self.pinned) + self.page_rows
+        else:
+            n_slots = len(self.texts)
 
         # Generate buttons and adequate screen width and height.
         self.buttons = []
-        self.screen_height = 300 if len(self.texts) <= 3 else (len(self.texts) + 2) * 60
+        self.screen_height = 300 if n_slots <= 3 else (n_slots + 2) * 60
         self.screen_width = self._generate_buttons()
         self.screen_width = 400 if self.screen_width < 320 else self.screen_width + 80
 
-        # Set screen.
-        self.screen = pygame.display.set_mode((self.screen_width, self.screen_height))
+        # Set screen, as a scene of the game window.
+        self.screen = window.open_scene(
+            (self.screen_width, self.screen_height), caption
+        )
         self.screen_rect = self.screen.get_rect()
-        pygame.display.set_caption(caption)
+
+        # The menu only has to be drawn again if the window was covered or restored.
+        self.redraw = True
 
     def _generate_buttons(self):
         """Make the buttons"""
@@ -51,24 +88,28 @@ class Menu:
 
         # Calculate position of first button.
         # As to make the list of buttons vertically centered on screen.
-        n_options = len(self.texts)
+        if self.scroll:
+            texts = self.pinned + self.rows[: self.page_rows]
+        else:
+            texts = self.texts
+        n_options = len(texts)
         over = n_options // 2
         middle = n_options % 2
-        ini_pos = (self.screen_height / 2) - 60 * over - 30 * (middle - 1)
+        self.ini_pos = (self.screen_height / 2) - 60 * over - 30 * (middle - 1)
 
         # Generate buttons.
         i = 0
-        for option in self.texts:
-            button = Button(
-                msg=option,
-                main_path=self.path,
-                pos_y=ini_pos + (60 * i),
-                **self.options[option] if self.custom else {}
-            )
+        for option in texts:
+            button = self._make_button(option, i)
             i += 1
             self.buttons.append(button)
             self.widths.append(button.msg_image.get_width())
 
+        if self.scroll:
+            # Every row must fit, but the fonts are monospaced, so the longest one
+            # is the widest and there is no need to render them all.
+            self.widths.append(self._get_list_width())
+
         # Add a back button if requested.
         if self.back:
             button = Button(
@@ -86,22 +127,119 @@ class Menu:
         # Returns maximum width among the buttons.
         return max(self.widths)
 
+    def _make_button(self, option, slot):
+        """Make the button of an option, in the given position from the top"""
+        return Button(
+            msg=option,
+            main_path=self.path,
+            pos_y=self.ini_pos + (60 * slot),
+            cache=not self.scroll,
+            **self.options[option] if self.custom else {},
+        )
+
+    def _get_list_width(self):
+        """Return the width of the text of the longest row of the list"""
+        if not self.rows:
+            return 0
+        longest = max(self.rows, key=len)
+        return self._make_button(longest, 0).msg_image.get_width()
+
+    ################################################################################################
+    # List mode functions
+    ################################################################################################
+
+    def _scroll_to(self, first_row):
+        """Show the rows of the list from first_row on"""
+        last_first_row = max(len(self.rows) - self.page_rows, 0)
+        first_row = min(max(first_row, 0), last_first_row)
+        if first_row == self.first_row:
+            return
+
+        # Replace the buttons of the rows (the pinned buttons come first, Back last).
+        self.first_row = first_row
+        n_pinned = len(self.pinned)
+        visible = self.rows[first_row : first_row + self.page_rows]
+        self.buttons[n_pinned : n_pinned + self.page_rows] = [
+            self._make_button(option, n_pinned + i) for i, option in enumerate(visible)
+        ]
+        self.redraw = True
+
+    def _check_list_keys(self, event):
+        """Scroll the list, or type the number of a row to jump to"""
+        if event.key == pygame.K_DOWN:
+            self._scroll_to(self.first_row + 1)
+        elif event.key == pygame.K_UP:
+            self._scroll_to(self.first_row - 1)
+        elif event.key == pygame.K_PAGEDOWN:
+            self._scroll_to(self.first_row + self.page_rows)
+        elif event.key == pygame.K_PAGEUP:
+            self._scroll_to(self.first_row - self.page_rows)
+        elif event.key == pygame.K_HOME:
+            self._scroll_to(0)
+        elif event.key == pygame.K_END:
+            self._scroll_to(len(self.rows))
+        elif event.key in (pygame.K_RETURN, pygame.K_KP_ENTER):
+            # Show the typed row at the top.
+            if self.jump_text:
+                self._scroll_to(int(self.jump_text) - 1)
+                self.jump_text = ""
+                self.redraw = True
+        elif event.key == pygame.K_BACKSPACE:
+            self.jump_text = self.jump_text[:-1]
+            self.redraw = True
+        elif event.key == pygame.K_ESCAPE:
+            self.jump_text = ""
+            self.redraw = True
+        elif event.unicode.isdigit() and len(self.jump_text) < 9:
+            self.jump_text += event.unicode
+            self.redraw = True
+
+    def _draw_footer(self):
+        """Show the visible rows of the list, or the row number being typed"""
+        if self.jump_text:
+            text = f"Go to: {self.jump_text}"
+        else:
+            last_row = self.first_row + self.page_rows
+            text = f"{self.first_row + 1}-{last_row} of {len(self.rows)}"
+        image = self.footer_font.render(text, True, (60, 60, 60), (230, 230, 230))
+        rect = image.get_rect()
+        rect.midbottom = (self.screen_rect.centerx, self.screen_rect.bottom - 10)
+        self.screen.blit(image, rect)
+
     def run_menu(self):
-        """Start the main loop for the menu"""
+        """
+        Start the main loop for the menu. The loop sleeps until there is
+        input, and only draws when the screen contents changed
+        """
         while True:
+            if self.redraw:
+                self._update_screen()
             option_selected = self._check_events()
-            self._update_screen()
             if option_selected:
                 return option_selected
 
     def _check_events(self):
         """Check for option selected from menu"""
-        for event in pygame.event.get():
-            if event.type == pygame.QUIT:
+        for event in wait_events():
+            if event.type in REDRAW_EVENTS:
+                self.redraw = True
+            elif event.type == pygame.QUIT:
                 sys.exit()
+            elif self.scroll and event.type == pygame.MOUSEWHEEL:
+                self._scroll_to(self.first_row - 3 * event.y)
+            elif self.scroll and event.type == pygame.KEYDOWN:
+                self._check_list_keys(event)
+            elif (
+                self.scroll
+                and event.type == pygame.MOUSEBUTTONDOWN
+                and event.button > 3
+            ):
+                # The wheel also sends button events, which are not clicks.
+                continue
             elif event.type == pygame.MOUSEBUTTONDOWN:
+                mouse_pos = window.scene_pos(event.pos)
                 for button in self.buttons:
-                    if button.b_rect.collidepoint(event.pos):
+                    if button.b_rect.collidepoint(mouse_pos):
                         if button.msg == "Back" or self.click:
                             self.click_sound.play()
                             return button.msg
@@ -112,4 +250,10 @@ class Menu:
         self.screen.fill((230, 230, 230))
         for button in self.buttons:
             button.draw_button(self.screen)
+        if self.scroll and self.rows:
+            self._draw_footer()
         pygame.display.flip()
+        self.redraw = False
+
+        # The game is started once the first menu is on screen.
+        startup.first_frame()
@@ -1,5 +1,8 @@
-import operator
+import time
+from bisect import bisect_left, insort
+from collections import Counter
 from datetime import datetime
+from itertools import count
 
 ####################################################################################################
 # Order and formating of ranking rows functions
@@ -27,11 +30,8 @@ def sort_scores(score_dict):
         for item in score_list
     ]
 
-    # Sort by date first, sooner first.
-    scores.sort(key=operator.itemgetter(3))
-
-    # Sort by score and lives left, higher first.
-    scores.sort(key=operator.itemgetter(1, 2), reverse=True)
+    # Sort by score and lives left, higher first, then by date, sooner first.
+    scores.sort(key=lambda row: (-row[1], -row[2], row[3]))
 
     return scores
 
@@ -78,6 +78,127 @@ def get_str_for_ranking(scores, maxim):
     return row
 
 
+####################################################################################################
+# Ranking index
+####################################################################################################
+
+
+class RankingIndex:
+    """
+    A class to keep the ranking sorted in memory as scores come in. Each user has a
+    key (-high score, -lives left, date, order, user), so the sorted list of keys is
+    the ranking, kept sorted with bisect. Top K is a slice and the rank of a user is
+    a binary search. The lengths of the values of each column are counted, so the
+    column widths are known without scanning the rows
+    """
+
+    def __init__(self, rows=()):
+        """
+        Initialize the index from rows of [user, high score, lives left, date],
+        as returned by ScoreStore.top
+        """
+
+        # Sorted keys, and the key of each user.
+        self.keys = []
+        self.user_keys = {}
+
+        # Ties (same score, lives and date) keep the order the scores came in.
+        self.order = count()
+
+        # Number of values of each length, for the user, high score and lives columns.
+        self.length_counts = {1: Counter(), 2: Counter(), 3: Counter()}
+
+        for user, high_score, lives_left, date in rows:
+            key = (-high_score, -lives_left, date, next(self.order), user)
+            self.keys.append(key)
+            self.user_keys[user] = key
+            self._count_lengths(key, 1)
+
+        # Already sorted if the rows were, otherwise sort once.
+        self.keys.sort()
+
+    def submit(self, user, high_score, lives_left, date):
+        """Set the best game of a user (date in Unix milliseconds)"""
+        self.remove(user)
+
+        key = (-high_score, -lives_left, date, next(self.order), user)
+        insort(self.keys, key)
+        self.user_keys[user] = key
+        self._count_lengths(key, 1)
+
+    def remove(self, user):
+        """Take a user out of the ranking, if present"""
+        key = self.user_keys.pop(user, None)
+        if key is not None:
+            del self.keys[bisect_left(self.keys, key)]
+            self._count_lengths(key, -1)
+
+    def top(self, k=None):
+        """Return the first k rows of [user, high score, lives left, date] (all if k is None)"""
+        return [[key[4], -key[0], -key[1], key[2]] for key in self.keys[:k]]
+
+    def rank_of(self, user):
+        """Return the rank of a user (1 is the best), or None if not ranked"""
+        key = self.user_keys.get(user)
+        if key is None:
+            return None
+        return bisect_left(self.keys, key) + 1
+
+    def projected_rank(self, user, score, lives_left):
+        """
+        Return the rank user would have if the current game (score and lives left)
+        ended now. As when the game is stored, it replaces the user's best game if
+        the score is at least that high score
+        """
+        key = self.user_keys.get(user)
+        if key is not None and score < -key[0]:
+            return self.rank_of(user)
+
+        # The game ends now, after every stored game.
+        new_key = (-score, -lives_left, time.time() * 1000, float("inf"), user)
+        rank = bisect_left(self.keys, new_key) + 1
+        if key is not None and key < new_key:
+            # The user's stored game would be replaced.
+            rank -= 1
+        return rank
+
+    def get_rows(self, start=0, stop=None):
+        """
+        Return the rows from start to stop (all if None) ready to show as in
+        set_date_and_idx: [rank, user, high score, lives left, date as string]
+        """
+        return [
+            [start + i + 1, key[4], -key[0], -key[1], _milliseconds_to_str_date(key[2])]
+            for i, key in enumerate(self.keys[start:stop])
+        ]
+
+    def get_max_len(self, title_row):
+        """
+        Return the column widths as get_max_len(rows, [0, 1, 2, 3, 4]) would for
+        the title row plus every row, from the counted lengths
+        """
+        max_len = [[0, max(len(str(title_row[0])), len(str(len(self.keys))))]]
+        for i in (1, 2, 3):
+            lengths = [length for length, n in self.length_counts[i].items() if n]
+            max_len.append([i, max([len(str(title_row[i]))] + lengths)])
+
+        # Every date has the same length.
+        date_len = len(_milliseconds_to_str_date(self.keys[0][2])) if self.keys else 0
+        max_len.append([4, max(len(str(title_row[4])), date_len)])
+
+        return max_len
+
+    def _count_lengths(self, key, n):
+        """Add n to the counts of the lengths of the values of a key"""
+        self.length_counts[1][len(str(key[4]))] += n
+        self.length_counts[2][len(str(-key[0]))] += n
+        self.length_counts[3][len(str(-key[1]))] += n
+
+    def __len__(self):
+        """Number of ranked users"""
+        return len(self.keys)
+
+
 ####################################################################################################
 # Auxiliary functions
 ####################################################################################################
@@ -113,7 +234,6 @@ def _get_white_spaces(row, max):
     whitespaces = {}
     for i in max:
         whitespace = i[1] - len(str(row[i[0]]))
-        sep = "".join(" " for j in range(whitespace))
-        whitespaces[i[0]] = sep
+        whitespaces[i[0]] = " " * whitespace
 
     return whitespaces
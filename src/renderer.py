@@ -0,0 +1,61 @@
+import pygame
+
+
+class DirtyRectRenderer:
+    """
+    A class to present only the parts of the screen that changed since the last frame.
+    Falls back to a full flip when too much of the screen is dirty
+    """
+
+    def __init__(self, screen, bg_color, max_dirty_fraction):
+        """Initialize the renderer for a screen"""
+
+        # Load game assets and data.
+        self.screen = screen
+        self.screen_rect = screen.get_rect()
+        self.bg_color = bg_color
+
+        # Position of the screen in the display, if it is a part of it (a scene).
+        self.offset = screen.get_abs_offset()
+
+        # Above this dirty area (in pixels) a full flip is cheaper than many small updates.
+        self.max_dirty_area = (
+            max_dirty_fraction * self.screen_rect.w * self.screen_rect.h
+        )
+
+        # Areas drawn during the last frame, which must be erased on the next one.
+        self.previous_rects = []
+
+        # The first frame always draws the whole screen.
+        self.full_redraw = True
+
+    def begin_frame(self):
+        """Erase what was drawn during the last frame"""
+        if self.full_redraw:
+            self.screen.fill(self.bg_color)
+        else:
+            for rect in self.previous_rects:
+                self.screen.fill(self.bg_color, rect)
+
+    def present(self, rects):
+        """
+        Push the areas erased at the start of the frame and the ones drawn
+        during it (rects) to the display
+        """
+        rects = [rect.clip(self.screen_rect) for rect in rects]
+        dirty_rects = self.previous_rects + rects
+        dirty_area = sum(rect.w * rect.h for rect in dirty_rects)
+
+        if self.full_redraw or dirty_area > self.max_dirty_area:
+            pygame.display.flip()
+        else:
+            if self.offset != (0, 0):
+                dirty_rects = [rect.move(self.offset) for rect in dirty_rects]
+            pygame.display.update(dirty_rects)
+
+        self.previous_rects = rects
+        self.full_redraw = False
+
+    def invalidate(self):
+        """Redraw the whole screen on the next frame"""
+        self.full_redraw = True
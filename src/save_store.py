@@ -0,0 +1,130 @@
+import json
+import os
+from pathlib import Path
+
+from snapshot import dump_snapshot, load_snapshot
+
+####################################################################################################
+# Saved games store
+####################################################################################################
+
+
+class SaveStore:
+    """
+    A class to keep the saved games. A small manifest lists every save (user, date,
+    level and score) and each save has its own record with the full game state,
+    which is only read when that save is loaded. The manifest is a file with one
+    JSON line per save, so saving a game appends a line and writes one record.
+    Records are binary snapshots (see snapshot.py), or JSON for older saves
+    """
+
+    def __init__(self, directory, legacy_filename=None, compress=True):
+        """
+        Initialize the store in a directory. If there is no manifest yet, the saves
+        of legacy_filename (a single JSON file with every saved game) are imported.
+        Records are zlib compressed if compress is True
+        """
+        self.directory = directory
+        self.compress = compress
+        self.manifest_filename = os.path.join(directory, "manifest.jsonl")
+
+        # Manifest entries by key, read on first use.
+        self._manifest = None
+
+        if legacy_filename and not os.path.exists(self.manifest_filename):
+            self._import_legacy(legacy_filename)
+
+    def manifest(self):
+        """
+        Return the manifest entries by key ("user(YYYY-MM-DD, HH:MM)"),
+        sorted by user first, and then date
+        """
+        entries = sorted(
+            self._get_manifest().items(),
+            key=lambda item: (item[1]["user"], item[1]["date"]),
+        )
+        return dict(entries)
+
+    def load(self, key):
+        """Return the full state of a saved game"""
+        record = os.path.join(self.directory, self._get_manifest()[key]["record"])
+        if record.endswith(".json"):
+            with open(record) as f:
+                return json.load(f)
+
+        with open(record, "rb") as f:
+            return load_snapshot(f.read())
+
+    def save(self, key, saved_game):
+        """Store a saved game, replacing the one with the same key if there is one"""
+        manifest = self._get_manifest()
+        Path(self.directory).mkdir(parents=True, exist_ok=True)
+
+        # A save with the same key keeps its record number.
+        if key in manifest:
+            number = os.path.splitext(manifest[key]["record"])[0]
+        else:
+            number = f"{len(manifest):06d}"
+        record = number + ".sav"
+
+        # Write the record first, so the manifest never lists a missing record.
+        with open(os.path.join(self.directory, record), "wb") as f:
+            f.write(dump_snapshot(saved_game, self.compress))
+
+        entry = {
+            "key": key,
+            "user": saved_game["user"],
+            "date": saved_game["date"],
+            "level": saved_game["level"],
+            "score": saved_game["current_score"],
+            "record": record,
+        }
+        with open(self.manifest_filename, "a") as f:
+            f.write(json.dumps(entry) + "\n")
+
+        # An older JSON record of the same save is no longer needed.
+        if key in manifest and manifest[key]["record"] != record:
+            os.remove(os.path.join(self.directory, manifest[key]["record"]))
+        manifest[key] = entry
+
+    def _get_manifest(self):
+        """Read the manifest, where later lines replace earlier ones with the same key"""
+        if self._manifest is None:
+            self._manifest = {}
+            try:
+                with open(self.manifest_filename) as f:
+                    for line in f:
+                        if line.strip():
+                            entry = json.loads(line)
+                            self._manifest[entry["key"]] = entry
+            except FileNotFoundError:
+                pass
+
+        return self._manifest
+
+    def _import_legacy(self, legacy_filename):
+        """Move the saves of the single JSON file into the store (the file is kept)"""
+        try:
+            with open(legacy_filename) as f:
+                saved_games = json.load(f)
+        except FileNotFoundError:
+            return
+
+        for key, saved_game in saved_games.items():
+            self.save(key, saved_game)
+
+
+# Open stores, by main path.
+_stores = {}
+
+
+def get_save_store(main_path):
+    """Return the saved games store of the game"""
+    store = _stores.get(main_path)
+    if store is None:
+        store = _stores[main_path] = SaveStore(
+            main_path + "user_data/saved_games",
+            main_path + "user_data/saved_games.json",
+        )
+
+    return store
@@ -0,0 +1,64 @@
+import heapq
+from itertools import count
+
+
+class Scheduler:
+    """
+    A class to run delayed actions from the game loop (respawn delays, fades, ...).
+    Time only advances when the loop calls update, so waiting never blocks the
+    loop, which keeps handling events and drawing. An action can hold the game
+    logic until it runs, like the pause after losing a ship
+    """
+
+    def __init__(self):
+        """Initialize an empty schedule"""
+
+        # Time (in seconds) the schedule has advanced so far.
+        self.time = 0.0
+
+        # Heap of (due time, order, action, hold) entries. The order keeps
+        # actions due at the same time in the order they were scheduled.
+        self.pending = []
+        self.order = count()
+
+        # Number of pending actions that hold the game logic.
+        self.holds = 0
+
+    def schedule(self, delay, action, hold=False):
+        """
+        Call action() after delay seconds. If hold is True, the game logic doesn't
+        advance until then. A delay of 0 or less runs the action right away
+        """
+        if delay <= 0:
+            action()
+            return
+
+        heapq.heappush(
+            self.pending, (self.time + delay, next(self.order), action, hold)
+        )
+        if hold:
+            self.holds += 1
+
+    def update(self, dt):
+        """Advance the schedule dt seconds and run the actions that are due"""
+        self.time += dt
+        while self.pending and self.pending[0][0] <= self.time:
+            _, _, action, hold = heapq.heappop(self.pending)
+            if hold:
+                self.holds -= 1
+            action()
+
+    def clear(self):
+        """Drop every pending action without running it"""
+        self.pending.clear()
+        self.holds = 0
+
+    def is_holding(self):
+        """Return True if a pending action holds the game logic"""
+        return self.holds > 0
+
+    def time_to_next(self):
+        """Return the seconds until the next action is due, or None if there are none"""
+        if not self.pending:
+            return None
+        return max(self.pending[0][0] - self.time, 0.0)
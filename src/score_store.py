@@ -0,0 +1,348 @@
+import json
+import os
+from abc import ABC, abstractmethod
+from datetime import datetime
+
+from ranking import RankingIndex, sort_scores
+
+try:
+    import sqlite3
+except ImportError:
+    # Some Python builds ship without sqlite3, the JSON file is used instead.
+    sqlite3 = None
+
+# Format of the dates in the JSON file of high scores.
+DATE_FORMAT = "%Y-%m-%d, %H:%M:%S"
+
+####################################################################################################
+# Score stores
+####################################################################################################
+
+
+class ScoreStore(ABC):
+    """
+    Base class for the stores of registered users and their best games.
+    Each user has a high score, the lives left, the maximum level and the date
+    (in Unix milliseconds) of that game. Users that never finished a game have
+    None in every field but the high score (0) and the maximum level (1).
+    The ranking is also kept in memory (see ranking), once it was asked for.
+    Backends implement the abstract methods
+    """
+
+    # Ranking index, built on first use.
+    _ranking = None
+
+    @abstractmethod
+    def users(self):
+        """Return the names of the registered users, in the order they registered"""
+
+    def add_user(self, user):
+        """Register a new user, with no games yet"""
+        self._add_user(user)
+        if self._ranking is not None:
+            self._ranking.remove(user)
+
+    @abstractmethod
+    def get_high_score(self, user):
+        """Return the high score of a user (0 if there is none)"""
+
+    def set_score(self, user, high_score, lives_left, max_level, date):
+        """Store the best game of a user (date is a datetime)"""
+        self._set_score(user, high_score, lives_left, max_level, date)
+        if self._ranking is not None:
+            self._ranking.submit(user, high_score, lives_left, _to_milliseconds(date))
+
+    def ranking(self):
+        """Return the ranking index, which follows every score stored from now on"""
+        if self._ranking is None:
+            self._ranking = RankingIndex(self.top())
+        return self._ranking
+
+    @abstractmethod
+    def top(self, n=None):
+        """
+        Return the ranking of the users that finished a game, as rows of
+        [user, high score, lives left, date], best first (the whole ranking if n is None)
+        """
+
+    def import_json(self, filename):
+        """Add (or replace) the users of a JSON file of high scores"""
+        self._import_json(filename)
+        # Many users changed, the ranking is built again when needed.
+        self._ranking = None
+
+    def export_json(self, filename):
+        """Write every user to a JSON file of high scores"""
+        with open(filename, "w") as f:
+            json.dump(self._get_score_dict(), f)
+
+    @abstractmethod
+    def _add_user(self, user):
+        """Store a new user"""
+
+    @abstractmethod
+    def _set_score(self, user, high_score, lives_left, max_level, date):
+        """Store the best game of a user"""
+
+    @abstractmethod
+    def _import_json(self, filename):
+        """Store the users of a JSON file of high scores"""
+
+    @abstractmethod
+    def _get_score_dict(self):
+        """Return every user as in the JSON file of high scores"""
+
+
+class JsonScoreStore(ScoreStore):
+    """A class to keep the scores in a JSON file, read and written whole"""
+
+    def __init__(self, filename):
+        """Initialize the store for a JSON file"""
+        self.filename = filename
+
+    def users(self):
+        """Return the names of the registered users, in the order they registered"""
+        return list(self._get_score_dict().keys())
+
+    def _add_user(self, user):
+        """Store a new user"""
+        user_scores = self._get_score_dict()
+        user_scores[user] = {
+            "high_score": 0,
+            "lives_left": None,
+            "max_level": 1,
+            "date": None,
+        }
+        self._write(user_scores)
+
+    def get_high_score(self, user):
+        """Return the high score of a user (0 if there is none)"""
+        user_score = self._get_score_dict().get(user)
+        return user_score["high_score"] if user_score else 0
+
+    def _set_score(self, user, high_score, lives_left, max_level, date):
+        """Store the best game of a user"""
+        user_scores = self._get_score_dict()
+        user_scores[user] = {
+            "high_score": high_score,
+            "lives_left": lives_left,
+            "max_level": max_level,
+            "date": date.strftime(DATE_FORMAT),
+        }
+        self._write(user_scores)
+
+    def top(self, n=None):
+        """
+        Return the ranking of the users that finished a game, as rows of
+        [user, high score, lives left, date], best first (the whole ranking if n is None)
+        """
+        user_scores = {
+            user: user_score
+            for user, user_score in self._get_score_dict().items()
+            if user_score["date"] is not None
+        }
+        return sort_scores(user_scores)[:n]
+
+    def _import_json(self, filename):
+        """Store the users of a JSON file of high scores"""
+        with open(filename) as f:
+            imported = json.load(f)
+        user_scores = self._get_score_dict()
+        user_scores.update(imported)
+        self._write(user_scores)
+
+    def _get_score_dict(self):
+        """Return every user as in the JSON file of high scores"""
+        try:
+            with open(self.filename) as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return {}
+
+    def _write(self, user_scores):
+        """Write the whole JSON file"""
+        with open(self.filename, "w") as f:
+            json.dump(user_scores, f)
+
+
+class SqliteScoreStore(ScoreStore):
+    """
+    A class to keep the scores in a SQLite database. The ranking order has an index,
+    so the best games are read in order without parsing or sorting every user,
+    and storing a game only writes its row
+    """
+
+    # Version of the database layout, stored as PRAGMA user_version.
+    version = 1
+
+    def __init__(self, filename, json_filename=None):
+        """
+        Open (or create) the database. A new database imports the users of
+        json_filename, if that file exists
+        """
+        self.connection = sqlite3.connect(filename)
+
+        if self.connection.execute("PRAGMA user_version").fetchone()[0] == 0:
+            self._create_tables()
+            if json_filename and os.path.exists(json_filename):
+                self.import_json(json_filename)
+
+    def _create_tables(self):
+        """Create the table of scores and its ranking index"""
+        with self.connection:
+            self.connection.execute("""
+                CREATE TABLE IF NOT EXISTS scores (
+                    user TEXT PRIMARY KEY,
+                    high_score INTEGER NOT NULL DEFAULT 0,
+                    lives_left INTEGER,
+                    max_level INTEGER,
+                    date INTEGER
+                )
+                """)
+            self.connection.execute("""
+                CREATE INDEX IF NOT EXISTS ranking
+                ON scores (high_score DESC, lives_left DESC, date)
+                """)
+            self.connection.execute(f"PRAGMA user_version = {self.version}")
+
+    def users(self):
+        """Return the names of the registered users, in the order they registered"""
+        rows = self.connection.execute("SELECT user FROM scores ORDER BY rowid")
+        return [row[0] for row in rows]
+
+    def _add_user(self, user):
+        """Store a new user"""
+        with self.connection:
+            self.connection.execute(
+                """
+                INSERT INTO scores (user, high_score, lives_left, max_level, date)
+                VALUES (?, 0, NULL, 1, NULL)
+                ON CONFLICT (user) DO UPDATE SET
+                    high_score = 0, lives_left = NULL, max_level = 1, date = NULL
+                """,
+                (user,),
+            )
+
+    def get_high_score(self, user):
+        """Return the high score of a user (0 if there is none)"""
+        row = self.connection.execute(
+            "SELECT high_score FROM scores WHERE user = ?", (user,)
+        ).fetchone()
+        return row[0] if row else 0
+
+    def _set_score(self, user, high_score, lives_left, max_level, date):
+        """Store the best game of a user"""
+        with self.connection:
+            self._upsert(
+                [(user, high_score, lives_left, max_level, _to_milliseconds(date))]
+            )
+
+    def top(self, n=None):
+        """
+        Return the ranking of the users that finished a game, as rows of
+        [user, high score, lives left, date], best first (the whole ranking if n is None)
+        """
+        rows = self.connection.execute(
+            """
+            SELECT user, high_score, lives_left, date FROM scores
+            WHERE date IS NOT NULL
+            ORDER BY high_score DESC, lives_left DESC, date
+            LIMIT ?
+            """,
+            (-1 if n is None else n,),
+        )
+        return [list(row) for row in rows]
+
+    def _import_json(self, filename):
+        """Store the users of a JSON file of high scores"""
+        with open(filename) as f:
+            user_scores = json.load(f)
+
+        rows = [
+            (
+                user,
+                user_score["high_score"],
+                user_score["lives_left"],
+                user_score["max_level"],
+                (
+                    _to_milliseconds(datetime.strptime(user_score["date"], DATE_FORMAT))
+                    if user_score["date"]
+                    else None
+                ),
+            )
+            for user, user_score in user_scores.items()
+        ]
+        with self.connection:
+            self._upsert(rows)
+
+    def _get_score_dict(self):
+        """Return every user as in the JSON file of high scores"""
+        rows = self.connection.execute("""
+            SELECT user, high_score, lives_left, max_level, date FROM scores
+            ORDER BY rowid
+            """)
+        return {
+            user: {
+                "high_score": high_score,
+                "lives_left": lives_left,
+                "max_level": max_level,
+                "date": (
+                    datetime.fromtimestamp(date / 1000).strftime(DATE_FORMAT)
+                    if date is not None
+                    else None
+                ),
+            }
+            for user, high_score, lives_left, max_level, date in rows
+        }
+
+    def _upsert(self, rows):
+        """Insert or replace rows of (user, high score, lives left, max level, date)"""
+        self.connection.executemany(
+            """
+            INSERT INTO scores (user, high_score, lives_left, max_level, date)
+            VALUES (?, ?, ?, ?, ?)
+            ON CONFLICT (user) DO UPDATE SET
+                high_score = excluded.high_score,
+                lives_left = excluded.lives_left,
+                max_level = excluded.max_level,
+                date = excluded.date
+            """,
+            rows,
+        )
+
+
+####################################################################################################
+# Store selection
+####################################################################################################
+
+# Open stores, by main path.
+_stores = {}
+
+
+def get_score_store(main_path):
+    """
+    Return the score store of the game. It is a SQLite database, which starts
+    with the users of the old JSON file, or that JSON file if there is no sqlite3
+    """
+    store = _stores.get(main_path)
+    if store is None:
+        json_filename = main_path + "user_data/high_scores.json"
+        if sqlite3 is not None:
+            store = SqliteScoreStore(
+                main_path + "user_data/high_scores.db", json_filename
+            )
+        else:
+            store = JsonScoreStore(json_filename)
+        _stores[main_path] = store
+
+    return store
+
+
+####################################################################################################
+# Auxiliary functions
+####################################################################################################
+
+
+def _to_milliseconds(date):
+    """Returns the date in Unix milliseconds from a datetime (to the second)"""
+    return int(date.replace(microsecond=0).timestamp()) * 1000
@@ -1,7 +1,6 @@
-import pygame.font
-from pygame.sprite import Group
+import pygame
 
-from ship import Ship
+from assets import assets
 
 
 class Scoreboard:
@@ -17,10 +16,27 @@ class Scoreboard:
         self.settings = ai_game.settings
         self.stats = ai_game.stats
 
+        # Ranking of the registered users (None for anonymous players).
+        self.ranking = ai_game.ranking
+
         # Font settings for scoring information.
         self.text_color = (30, 30, 30)
         self.font_filename = ai_game.path + "fonts/unispace.ttf"
-        self.font = pygame.font.Font(self.font_filename, 30)
+        self.font = assets.font(self.font_filename, 30)
+
+        # Shared ship image used to show the remaining lives.
+        self.ship_image = assets.image(ai_game.path + "images/ship.bmp")
+
+        # Digits and separator are rendered once, and every number is drawn from them.
+        self.glyphs = self._prep_glyphs()
+
+        # Each field is a small surface of its own, only drawn again when its text
+        # changes, so an update costs as much as the field and not the whole screen
+        # width. Fields and ships are shown with a single blits call.
+        self.fields = {}
+        self.ships_left = None
+        self.ship_rects = []
+        self.rank_rect = None
 
         # Prepare the initial score images.
         self.prep_images()
@@ -35,75 +51,133 @@ class Scoreboard:
         self.prep_high_score()
         self.prep_level()
         self.prep_ships()
+        self.prep_rank()
 
     def prep_score(self):
-        """Turn the score into a rendered image"""
+        """Draw the score on the HUD"""
 
-        # Render the current score.
+        # Format the current score.
         rounded_score = round(self.stats.score, -1)
         score_str = "{:,}".format(rounded_score)
-        self.score_image = self.font.render(
-            score_str, True, self.text_color, self.settings.bg_color
-        )
 
         # Display the score at the top right of the screen.
-        self.score_rect = self.score_image.get_rect()
-        self.score_rect.right = self.scree_rect.right - 20
-        self.score_rect.top = 15
+        self.score_rect = self._draw_field(
+            "score", score_str, right=self.scree_rect.right - 20, top=15
+        )
 
     def prep_high_score(self):
-        """Turn the high score into a rendered image"""
+        """Draw the high score on the HUD"""
 
-        # Render the high score.
+        # Format the high score.
         high_score = round(self.stats.high_score, -1)
         high_score_str = "{:,}".format(high_score)
-        self.high_score_image = self.font.render(
-            high_score_str, True, self.text_color, self.settings.bg_color
-        )
 
         # Center the high score at the top of the screen.
-        self.high_score_rect = self.high_score_image.get_rect()
-        self.high_score_rect.centerx = self.scree_rect.centerx
-        self.high_score_rect.top = self.score_rect.top - 5
+        self.high_score_rect = self._draw_field(
+            "high_score",
+            high_score_str,
+            centerx=self.scree_rect.centerx,
+            top=self.score_rect.top - 5,
+        )
 
     def prep_level(self):
-        """Turn the level into a rendered image"""
+        """Draw the level on the HUD"""
 
-        # Render the current level.
-        level_str = str(self.stats.level)
-        self.level_image = self.font.render(
-            level_str, True, self.text_color, self.settings.bg_color
+        # Position the level below the score.
+        self.level_rect = self._draw_field(
+            "level",
+            str(self.stats.level),
+            right=self.score_rect.right,
+            top=self.score_rect.bottom + 10,
         )
 
-        # Position the level below the score.
-        self.level_rect = self.level_image.get_rect()
-        self.level_rect.right = self.score_rect.right
-        self.level_rect.top = self.score_rect.bottom + 10
+    def prep_rank(self):
+        """Draw on the HUD the rank the player would have if the game ended now"""
+        if self.ranking is None:
+            return
+
+        rank = self.ranking.projected_rank(
+            self.ai_game.user, self.stats.score, self.stats.ships_left + 1
+        )
+
+        # Center the rank below the high score.
+        self.rank_rect = self._draw_field(
+            "rank",
+            f"#{rank:,}",
+            centerx=self.scree_rect.centerx,
+            top=self.high_score_rect.bottom + 5,
+        )
 
     def prep_ships(self):
         """Show how many ships are left"""
-        self.ships = Group()
-        for ship_number in range(self.stats.ships_left + 1):
-            ship = Ship(self.ai_game)
-            ship.rect.x = 10 + ship_number * ship.rect.width
-            ship.rect.y = 10
-            self.ships.add(ship)
+        ships_left = self.stats.ships_left
+        if self.ships_left == ships_left:
+            return
+        self.ships_left = ships_left
+
+        self.ship_rects = []
+        for ship_number in range(ships_left + 1):
+            ship_rect = self.ship_image.get_rect()
+            ship_rect.x = 10 + ship_number * ship_rect.width
+            ship_rect.y = 10
+            self.ship_rects.append(ship_rect)
 
     ################################################################################################
     # Auxiliary functions
     ################################################################################################
 
-    def check_high_score(self):
-        """Check to see if there's a new high score"""
-        if self.stats.score > self.stats.high_score:
-            # Updates high score on stats.
-            self.stats.high_score = self.stats.score
-            # Updates high score on screen.
-            self.prep_high_score()
+    def get_rects(self):
+        """Return the screen areas covered by the scoring information"""
+        rects = [self.score_rect, self.high_score_rect, self.level_rect]
+        rects.extend(self.ship_rects)
+        if self.rank_rect:
+            rects.append(self.rank_rect)
+        return rects
 
     def show_score(self):
         """Draw scores, level, and ships to the screen"""
-        self.screen.blit(self.score_image, self.score_rect)
-        self.screen.blit(self.high_score_image, self.high_score_rect)
-        self.screen.blit(self.level_image, self.level_rect)
-        self.ships.draw(self.screen)
+        ship_image = self.ship_image
+        self.screen.blits(
+            [(image, rect) for _, image, rect in self.fields.values()]
+            + [(ship_image, ship_rect) for ship_rect in self.ship_rects],
+            False,
+        )
+
+    def _prep_glyphs(self):
+        """Render every character a number (or a rank) can have, once"""
+        bg_color = self.settings.bg_color
+        return {
+            char: assets.rendered(
+                ("glyph", self.font_filename, 30, char, self.text_color, bg_color),
+                lambda char=char: self.font.render(
+                    char, True, self.text_color, bg_color
+                ),
+            )
+            for char in "0123456789,#"
+        }
+
+    def _draw_field(self, name, text, **position):
+        """
+        Draw text from the glyphs on the surface of a field, in place of its previous
+        text, and return its rect. Nothing is drawn if the text didn't change
+        """
+        old_text, _, old_rect = self.fields.get(name, (None, None, None))
+        if text == old_text:
+            return old_rect
+
+        glyphs = [self.glyphs[char] for char in text]
+        rect = pygame.Rect(0, 0, 0, self.glyphs["0"].get_height())
+        rect.width = sum(glyph.get_width() for glyph in glyphs)
+        for attribute, value in position.items():
+            setattr(rect, attribute, value)
+
+        image = pygame.Surface(rect.size)
+        if assets.has_display():
+            image = image.convert()
+        x = 0
+        for glyph in glyphs:
+            image.blit(glyph, (x, 0))
+            x += glyph.get_width()
+
+        self.fields[name] = (text, image, rect)
+        return rect
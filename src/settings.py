@@ -11,6 +11,51 @@ class Settings:
         # Background color.
         self.bg_color = (230, 230, 230)
 
+        # Game loop settings.
+        # Simulation ticks per second (the game logic always advances in fixed steps).
+        self.tick_rate = 120
+        self.tick_time = 1 / self.tick_rate
+        # Maximum frames drawn per second (0 = no cap).
+        self.max_fps = 60
+        # Ask the display to synchronize with the monitor refresh rate.
+        self.vsync = False
+        # Longest time (in seconds) simulated after a single frame, to recover from stalls.
+        self.max_frame_time = 0.25
+        # While paused or in a menu, longest time (in ms) to sleep waiting for input.
+        self.idle_timeout = 250
+        # Delay (in seconds) after losing a ship, during which the game logic stops.
+        # The game loop keeps running, and a delay of 0 skips it (e.g. for tests).
+        self.ship_lost_delay = 0.8
+
+        # Render settings.
+        # Only push the parts of the screen that changed to the display.
+        self.dirty_rects = True
+        # Fraction of the screen area above which a full flip is used instead.
+        self.max_dirty_fraction = 0.4
+        # Draw the fleet from a cached surface of the formation, where kills only clear
+        # the cell of the alien.
+        self.cache_fleet_layer = True
+
+        # Frame timing (--frame-timing or F3): number of frames kept, and seconds
+        # between updates of the overlay.
+        self.frame_timing_frames = 3600
+        self.frame_timing_refresh = 0.5
+
+        # Performance governor (see governor.py): the quality goes down when frames
+        # take longer than frame_budget seconds to compute and draw, and back up when
+        # they take less than quality_headroom of it, at most every quality_cooldown
+        # seconds.
+        self.adaptive_quality = True
+        self.frame_budget = 1 / self.max_fps if self.max_fps else 1 / 60
+        self.quality_headroom = 0.7
+        self.quality_cooldown = 2.0
+        # Seconds between redraws of the score, high score and rank (slow HUD level).
+        self.slow_hud_refresh = 0.25
+
+        # All speeds are in pixels per second. Saved games from before speeds were
+        # time based stored pixels per frame, this converts them.
+        self.legacy_speed_scale = 120
+
         # Extra ships (initial lives = extra ships + 1).
         self.ship_limit = 2
 
@@ -18,11 +63,19 @@ class Settings:
         self.bullet_width = 3
         self.bullet_height = 15
         self.bullet_color = (60, 60, 60)
-        self.bullets_allowed = 3
+        self.normal_bullets_allowed = 3
+        # Bullets allowed at once in rapid-fire mode (see set_rapid_fire).
+        self.rapid_fire_bullets_allowed = 300
+        self.bullets_allowed = self.normal_bullets_allowed
 
-        # Alien settings.
+        # Alien settings (the drop is in pixels each time the fleet hits an edge).
         self.fleet_drop_speed = 10
 
+        # Maximum speeds reached when leveling up.
+        self.ship_speed_max = 480
+        self.bullet_speed_max = 960
+        self.alien_speed_max = 360
+
         # How quickly the game speeds up.
         self.speedup_scale = 1.03
         # How quickly the alien point values increase.
@@ -44,18 +97,22 @@ class Settings:
         # How many points killing an alien gives.
         self.alien_points = 20
 
+    def set_rapid_fire(self, enabled):
+        """Allow many more bullets on the screen at once (rapid-fire and power-up modes)"""
+        if enabled:
+            self.bullets_allowed = self.rapid_fire_bullets_allowed
+        else:
+            self.bullets_allowed = self.normal_bullets_allowed
+
     def increase_speed(self):
         """Increase speed settings and alien point values"""
 
-        # Max. ship speed = 4.
-        if self.ship_speed <= 4:
+        if self.ship_speed <= self.ship_speed_max:
             self.ship_speed *= self.speedup_scale
 
-        # Max. bullet speed = 8.
-        if self.bullet_speed <= 8:
+        if self.bullet_speed <= self.bullet_speed_max:
             self.bullet_speed *= self.speedup_scale
 
-        # Max. bullet speed = 8.
-        if self.alien_speed <= 3:
+        if self.alien_speed <= self.alien_speed_max:
             self.alien_speed *= self.speedup_scale
         self.alien_points = int(self.alien_points * self.score_scale)
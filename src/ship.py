@@ -1,6 +1,7 @@
-import pygame
 from pygame.sprite import Sprite
 
+from assets import assets
+
 
 class Ship(Sprite):
     """A class to manage the ship"""
@@ -11,12 +12,11 @@ class Ship(Sprite):
         super().__init__()
 
         # Load game assets and data.
-        self.screen = ai_game.screen
         self.screen_rect = ai_game.screen_rect
         self.settings = ai_game.settings
 
-        # Load the ship image and get its rect.
-        self.image = pygame.image.load(ai_game.path + "images/ship.bmp")
+        # Get the shared ship image and its rect.
+        self.image = assets.image(ai_game.path + "images/ship.bmp")
         self.rect = self.image.get_rect()
 
         # Start each new ship at the bottom center of the screen.
@@ -29,21 +29,21 @@ class Ship(Sprite):
         self.moving_right = False
         self.moving_left = False
 
-    def update(self):
-        """Update the ship's position based on the movement flag"""
+    def update(self, dt):
+        """Update the ship's position based on the movement flag, dt seconds ahead"""
 
         # Update the ship's x value.
         if self.moving_right and self.rect.right < self.screen_rect.right:
-            self.x += self.settings.ship_speed
+            self.x += self.settings.ship_speed * dt
         if self.moving_left and self.rect.left > 0:
-            self.x -= self.settings.ship_speed
+            self.x -= self.settings.ship_speed * dt
 
         # Update rect object from self.x.
         self.rect.x = self.x
 
-    def blitme(self):
+    def blitme(self, screen):
         """Draw the ship at its current location"""
-        self.screen.blit(self.image, self.rect)
+        screen.blit(self.image, self.rect)
 
     def center_ship(self):
         """Center the ship on the screen"""
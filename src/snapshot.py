@@ -0,0 +1,181 @@
+import struct
+import zlib
+
+import numpy as np
+
+####################################################################################################
+# Binary snapshots of saved games
+####################################################################################################
+
+# Layout (little endian):
+#
+#   header   magic "AISG", version (B), flags (B)
+#   body     zlib compressed if FLAG_ZLIB is set:
+#            scores, speeds and positions (_NUMBERS)
+#            initial difficulty (3 doubles)
+#            user and screen size (length prefixed UTF-8)
+#            fleet, as an occupancy bitmap (FLAG_BITMAP) or as packed positions
+#
+# A new version can change anything after the header.
+
+MAGIC = b"AISG"
+VERSION = 1
+
+# Header flags.
+FLAG_ZLIB = 1
+FLAG_BITMAP = 2
+FLAG_SPEED_PX_S = 4
+
+_HEADER = struct.Struct("<4sBB")
+
+# high_score, ship_left, current_score, level, ship_speed, bullet_speed, alien_speed,
+# alien_points, fleet_direction, ship_x, date.
+_NUMBERS = struct.Struct("<qiqidddqbdd")
+_INI_DIFF = struct.Struct("<ddd")
+_STRING_LENGTH = struct.Struct("<H")
+
+# Bitmap fleet: x, y, rows, columns (followed by the packed grid bits).
+_BITMAP_FLEET = struct.Struct("<dqHH")
+# Packed positions fleet: number of aliens (followed by the x and the y arrays).
+_POSITIONS_FLEET = struct.Struct("<I")
+
+
+def dump_snapshot(saved_game, compress=True):
+    """
+    Return the binary snapshot of a saved game, as built by
+    AlienInvasion._get_current_game_data
+    """
+    flags = 0
+    if saved_game.get("speed_unit") == "px/s":
+        flags |= FLAG_SPEED_PX_S
+
+    parts = [
+        _NUMBERS.pack(
+            saved_game["high_score"],
+            saved_game["ship_left"],
+            saved_game["current_score"],
+            saved_game["level"],
+            saved_game["ship_speed"],
+            saved_game["bullet_speed"],
+            saved_game["alien_speed"],
+            saved_game["alien_points"],
+            saved_game["fleet_direction"],
+            saved_game["ship_x"],
+            saved_game["date"],
+        ),
+        _INI_DIFF.pack(*saved_game["ini_diff"]),
+        _pack_string(saved_game["user"]),
+        _pack_string(saved_game["screen_size"]),
+    ]
+
+    if "fleet" in saved_game:
+        # The whole formation in one bit per cell.
+        flags |= FLAG_BITMAP
+        x, y, grid = saved_game["fleet"]
+        rows, columns = grid.shape
+        parts.append(_BITMAP_FLEET.pack(x, y, rows, columns))
+        parts.append(np.packbits(grid, axis=None).tobytes())
+    else:
+        # Older saves, with the position of every alien.
+        aliens = saved_game["aliens"]
+        parts.append(_POSITIONS_FLEET.pack(len(aliens)))
+        parts.append(np.array([item["x"] for item in aliens], dtype="<f8").tobytes())
+        parts.append(np.array([item["y"] for item in aliens], dtype="<f8").tobytes())
+
+    body = b"".join(parts)
+    if compress:
+        flags |= FLAG_ZLIB
+        body = zlib.compress(body)
+
+    return _HEADER.pack(MAGIC, VERSION, flags) + body
+
+
+def load_snapshot(data):
+    """Return the saved game stored in a binary snapshot"""
+    magic, version, flags = _HEADER.unpack_from(data)
+    if magic != MAGIC:
+        raise ValueError("Not a saved game snapshot")
+    if version != VERSION:
+        raise ValueError(f"Unsupported saved game snapshot version: {version}")
+
+    body = data[_HEADER.size :]
+    if flags & FLAG_ZLIB:
+        body = zlib.decompress(body)
+
+    (
+        high_score,
+        ship_left,
+        current_score,
+        level,
+        ship_speed,
+        bullet_speed,
+        alien_speed,
+        alien_points,
+        fleet_direction,
+        ship_x,
+        date,
+    ) = _NUMBERS.unpack_from(body)
+    offset = _NUMBERS.size
+    ini_diff = list(_INI_DIFF.unpack_from(body, offset))
+    offset += _INI_DIFF.size
+    user, offset = _unpack_string(body, offset)
+    screen_size, offset = _unpack_string(body, offset)
+
+    saved_game = {
+        # Scores.
+        "high_score": high_score,
+        "ship_left": ship_left,
+        "current_score": current_score,
+        "level": level,
+        # Speeds.
+        "ship_speed": ship_speed,
+        "bullet_speed": bullet_speed,
+        "alien_speed": alien_speed,
+        "alien_points": alien_points,
+        "fleet_direction": fleet_direction,
+        # Screen state.
+        "ship_x": ship_x,
+        # Configuration.
+        "user": user,
+        "ini_diff": ini_diff,
+        "screen_size": screen_size,
+        "date": date,
+    }
+    if flags & FLAG_SPEED_PX_S:
+        saved_game["speed_unit"] = "px/s"
+
+    if flags & FLAG_BITMAP:
+        x, y, rows, columns = _BITMAP_FLEET.unpack_from(body, offset)
+        offset += _BITMAP_FLEET.size
+        bits = np.frombuffer(body, dtype=np.uint8, offset=offset)
+        grid = np.unpackbits(bits, count=rows * columns).astype(bool)
+        saved_game["fleet"] = (x, y, grid.reshape(rows, columns))
+    else:
+        (count,) = _POSITIONS_FLEET.unpack_from(body, offset)
+        offset += _POSITIONS_FLEET.size
+        x = np.frombuffer(body, dtype="<f8", count=count, offset=offset)
+        y = np.frombuffer(body, dtype="<f8", count=count, offset=offset + 8 * count)
+        saved_game["aliens"] = [
+            {"x": item_x, "y": item_y} for item_x, item_y in zip(x.tolist(), y.tolist())
+        ]
+
+    return saved_game
+
+
+####################################################################################################
+# Auxiliary functions
+####################################################################################################
+
+
+def _pack_string(string):
+    """Returns a string as its length followed by its UTF-8 bytes"""
+    data = string.encode("utf-8")
+    return _STRING_LENGTH.pack(len(data)) + data
+
+
+def _unpack_string(data, offset):
+    """Returns the string packed at offset, and the offset after it"""
+    (length,) = _STRING_LENGTH.unpack_from(data, offset)
+    offset += _STRING_LENGTH.size
+    string = data[offset : offset + length].decode("utf-8")
+    return string, offset + length
@@ -0,0 +1,114 @@
+import sys
+import time
+from contextlib import contextmanager
+
+####################################################################################################
+# Startup profile
+####################################################################################################
+
+
+class StartupProfile:
+    """
+    A class to time the startup of the game, from the first import until the first
+    menu frame is on screen: imports, subsystem initialization and asset loading.
+    The times are always taken (it's a few clock reads), but only reported if the
+    game was started with --profile-startup. Work that can wait until the game is
+    on screen (e.g. preloading assets) is deferred until the first frame
+    """
+
+    def __init__(self):
+        """Start the clock"""
+
+        # Report the profile when the first frame is drawn?
+        self.enabled = "--profile-startup" in sys.argv
+
+        self.start = time.perf_counter()
+
+        # Time of the last mark, and steps marked so far: [(name, seconds)].
+        self.last_mark = self.start
+        self.steps = []
+
+        # Time (in seconds) and count of timed tasks, by name (e.g. "init display").
+        self.times = {}
+        self.counts = {}
+
+        # Is the first frame on screen?
+        self.done = False
+
+        # Actions to run once the first frame is on screen: [(action, args)].
+        self.deferred = []
+
+    def mark(self, name):
+        """Record the time since the last mark (or the start) as a startup step"""
+        now = time.perf_counter()
+        self.steps.append((name, now - self.last_mark))
+        self.last_mark = now
+
+    @contextmanager
+    def timed(self, name):
+        """Add the time taken by the block to the task name, until the first frame"""
+        if self.done:
+            yield
+            return
+
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.times[name] = self.times.get(name, 0) + time.perf_counter() - start
+            self.counts[name] = self.counts.get(name, 0) + 1
+
+    def defer(self, action, *args):
+        """Run action(*args) once the first frame is on screen (now if it already is)"""
+        if self.done:
+            action(*args)
+        else:
+            self.deferred.append((action, args))
+
+    def first_frame(self):
+        """
+        Stop timing, print the report if profiling is enabled,
+        and run the deferred actions
+        """
+        if self.done:
+            return
+
+        self.done = True
+        self.total = time.perf_counter() - self.start
+        if self.enabled:
+            print(self.report(), file=sys.stderr)
+
+        for action, args in self.deferred:
+            action(*args)
+        self.deferred.clear()
+
+    def report(self):
+        """Return the startup profile as text"""
+        lines = ["Startup profile (until the first menu frame):"]
+        for name, seconds in self.steps:
+            lines.append(_format_line(name, seconds))
+        for name in sorted(self.times):
+            lines.append(_format_line(name, self.times[name], self.counts[name]))
+
+        timed = sum(seconds for _, seconds in self.steps) + sum(self.times.values())
+        lines.append(_format_line("other", self.total - timed))
+        lines.append(_format_line("total", self.total))
+
+        return "\n".join(lines)
+
+
+####################################################################################################
+# Auxiliary functions
+####################################################################################################
+
+
+def _format_line(name, seconds, count=None):
+    """Returns a row of the report: name, time in milliseconds and count"""
+    line = f"  {name:<24}{seconds * 1000:>9.1f} ms"
+    if count is not None:
+        line += f"  ({count}x)"
+    return line
+
+
+# Profile of the current process.
+startup = StartupProfile()
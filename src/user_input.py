@@ -1,9 +1,11 @@
 import sys
 
 import pygame
-from pygame.mixer import Sound
 
+from assets import assets
 from button import Button
+from idle import REDRAW_EVENTS, wait_events
+from window import window
 
 
 class InputBox:
@@ -11,17 +13,17 @@ class InputBox:
 
     def __init__(self, main_path, old_users):
 
-        pygame.init()
+        window.init()
 
         # List of already registered users.
         self.old_users = old_users
 
-        # Display screen.
-        self.screen = pygame.display.set_mode((500, 300))
+        # Display screen, as a scene of the game window.
+        self.screen = window.open_scene((500, 300))
         self.screen_rect = self.screen.get_rect()
 
         # Click sound.
-        self.click_sound = Sound(main_path + "sounds/click.wav")
+        self.click_sound = assets.sound(main_path + "sounds/click.wav")
 
         # Fonts.
         self.font_filename = main_path + "fonts/bpmono.ttf"
@@ -30,8 +32,8 @@ class InputBox:
         self.color_inactive = pygame.Color("gray60")
         self.color_active = pygame.Color("black")
         self.color_warning = pygame.Color("red")
-        self.font = pygame.font.Font(self.font_filename, 20)
-        self.font_warning = pygame.font.SysFont("calibri", 22)
+        self.font = assets.font(self.font_filename, 20)
+        self.font_warning = assets.sys_font("calibri", 22)
 
         # Input box parameters.
         self.rect = pygame.Rect(0, 0, 140, 32)
@@ -50,6 +52,9 @@ class InputBox:
         self.warning = False
         self.new_user = None
 
+        # Only draw the screen again when something changed.
+        self.redraw = True
+
         # Back button.
         self.button = Button(
             msg="Back",
@@ -63,10 +68,14 @@ class InputBox:
         )
 
     def run_menu(self):
-        """Start the main loop for the menu"""
+        """
+        Start the main loop for the menu. The loop sleeps until there is
+        input, and only draws when the screen contents changed
+        """
         while True:
+            if self.redraw:
+                self._update_screen()
             self.new_user = self._check_events()
-            self._update_screen()
             if self.new_user in self.old_users:
                 # If new user already exists, clean screen and set warning.
                 self._resize()
@@ -78,14 +87,18 @@ class InputBox:
     def _check_events(self):
         """Check input from user"""
         response = None
-        for event in pygame.event.get():
-            if event.type == pygame.QUIT:
+        for event in wait_events():
+            if event.type in REDRAW_EVENTS:
+                self.redraw = True
+            elif event.type == pygame.QUIT:
                 sys.exit()
             elif event.type == pygame.MOUSEBUTTONDOWN:
-                if self.button.b_rect.collidepoint(event.pos):
+                self.redraw = True
+                mouse_pos = window.scene_pos(event.pos)
+                if self.button.b_rect.collidepoint(mouse_pos):
                     self.click_sound.play()
                     response = "Back"
-                elif self.rect.collidepoint(event.pos):
+                elif self.rect.collidepoint(mouse_pos):
                     self.click_sound.play()
                     # Toggle the active state of input box.
                     self.active = not self.active
@@ -94,6 +107,7 @@ class InputBox:
                 # Set the correct color for the input box.
                 self.color = self.color_active if self.active else self.color_inactive
             elif event.type == pygame.KEYDOWN:
+                self.redraw = True
                 if self.active:
                     if event.key == pygame.K_RETURN:
                         # No leading or trailing whitespaces allowed.
@@ -117,6 +131,7 @@ class InputBox:
         self.screen.fill((230, 230, 230))
         self._draw()
         pygame.display.flip()
+        self.redraw = False
 
     def _resize(self):
         """Resize the box if the text is too long"""
@@ -129,6 +144,7 @@ class InputBox:
         self.text = ""
         self.txt_surface = self.font.render(self.text, True, self.color)
         self.warning = True
+        self.redraw = True
         self.txt_warning = self.font_warning.render(
             f"{user} already exist as an user.", True, self.color_warning
         )
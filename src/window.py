@@ -0,0 +1,123 @@
+import pygame
+
+from startup import startup
+
+
+class Window:
+    """
+    The game window, opened once and shared by every scene (the menus, the input
+    box and the game). Each scene draws on a surface of its own size, centered
+    inside the window, so going from one scene to another doesn't change the
+    display mode. The mode only changes to switch between windowed and full screen
+    or vertical sync, or to grow the window for a scene that doesn't fit
+    """
+
+    def __init__(self, min_size=(800, 780), bg_color=(230, 230, 230)):
+        """Initialize the window state (nothing is opened until a scene needs it)"""
+
+        # Smallest window size, which fits the game and the usual menus.
+        self.min_size = min_size
+
+        # Color of the window around the scene.
+        self.bg_color = bg_color
+
+        # Display surface and its mode.
+        self.display = None
+        self.fullscreen = False
+        self.vsync = False
+
+        # Area of the display used by the current scene.
+        self.scene_rect = None
+
+        self.initialized = False
+
+    def init(self):
+        """
+        Start the display subsystem, only the first time. The other subsystems are
+        started when first used (see AssetRegistry), not with pygame.init()
+        """
+        if not self.initialized:
+            with startup.timed("init display"):
+                pygame.display.init()
+            self.initialized = True
+
+    def open_scene(self, size, caption=None, fullscreen=None, vsync=None):
+        """
+        Return the surface a scene of the given size draws on. size None takes the
+        whole window. fullscreen and vsync set the display mode, None keeps it
+        """
+        self.init()
+
+        if fullscreen is None:
+            fullscreen = self.fullscreen
+        if vsync is None:
+            vsync = self.vsync
+
+        # Change the display mode only if needed.
+        display_size = self.display.get_size() if self.display else (0, 0)
+        fits = size is None or (
+            size[0] <= display_size[0] and size[1] <= display_size[1]
+        )
+        if (
+            self.display is None
+            or fullscreen != self.fullscreen
+            or vsync != self.vsync
+            or not fits
+        ):
+            self._set_mode(size, fullscreen, vsync)
+
+        if caption:
+            pygame.display.set_caption(caption)
+
+        # Clear the whole window and center the scene in it.
+        display_rect = self.display.get_rect()
+        self.display.fill(self.bg_color)
+        if size is None:
+            self.scene_rect = display_rect
+            return self.display
+
+        self.scene_rect = pygame.Rect((0, 0), size)
+        self.scene_rect.center = display_rect.center
+        return self.display.subsurface(self.scene_rect)
+
+    def scene_pos(self, pos):
+        """Return a window position (e.g. of the mouse) in the coordinates of the scene"""
+        return (pos[0] - self.scene_rect.x, pos[1] - self.scene_rect.y)
+
+    def _set_mode(self, size, fullscreen, vsync):
+        """Open the display, big enough for a scene of the given size"""
+        if fullscreen:
+            display_size = (0, 0)
+            flags = pygame.FULLSCREEN
+        else:
+            # The window never shrinks, so it only grows once for a big scene.
+            current = self.display.get_size() if self.display else (0, 0)
+            scene = size or (0, 0)
+            if self.fullscreen:
+                current = (0, 0)
+            display_size = tuple(
+                max(values) for values in zip(self.min_size, current, scene)
+            )
+            flags = 0
+
+        self.display = None
+        if vsync:
+            # Vertical sync needs a renderer, which pygame only provides with SCALED.
+            if display_size == (0, 0):
+                display_size = pygame.display.get_desktop_sizes()[0]
+            try:
+                self.display = pygame.display.set_mode(
+                    display_size, flags | pygame.SCALED, vsync=1
+                )
+            except pygame.error:
+                # Vertical sync not supported, fall back to a normal window.
+                pass
+        if self.display is None:
+            self.display = pygame.display.set_mode(display_size, flags)
+
+        self.fullscreen = fullscreen
+        self.vsync = vsync
+
+
+# Window shared by every scene.
+window = Window()